@@ -0,0 +1,159 @@
+"""
+Compare GraphQL throughput of the sync view (WSGI) and the async view (ASGI)
+at high concurrency.
+
+Both stacks run in-process against a throwaway database seeded by this
+script, so nothing but the repo's own requirements is needed:
+
+    python benchmarks/asgi_vs_wsgi.py --concurrency 64 --requests 2000
+
+WSGI requests go through Django's WSGI handler on a pool of `concurrency`
+threads (one thread per in-flight request, like a threaded WSGI server).
+ASGI requests go through Django's ASGI handler on a single event loop with
+`concurrency` requests in flight at once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipe_manager.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment
+from django.urls import path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.schema import schema
+from recipes.views import AsyncAuthenticatedGraphQLView, AuthenticatedGraphQLView
+
+urlpatterns = [
+    path('graphql/sync/', AuthenticatedGraphQLView.as_view(schema=schema)),
+    path('graphql/async/', AsyncAuthenticatedGraphQLView.as_view(schema=schema)),
+]
+
+QUERY = """
+query {
+  recipes(limit: 20) {
+    id
+    name
+    ingredientCount
+    ingredients { quantity ingredient { name unit } }
+  }
+}
+"""
+
+
+def seed(recipes, ingredients_per_recipe):
+    user = User.objects.create_user(username='benchmark', password='benchmark')
+    ingredients = Ingredient.objects.bulk_create(
+        [Ingredient(name=f'Ingredient {i}', unit='g') for i in range(200)]
+    )
+    created = Recipe.objects.bulk_create(
+        [Recipe(name=f'Recipe {i}', description='Benchmark recipe ' * 20, created_by=user) for i in range(recipes)]
+    )
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredients[(recipe.id + offset) % len(ingredients)], quantity=1)
+        for recipe in created
+        for offset in range(ingredients_per_recipe)
+    ])
+    return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+
+def summarize(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'stack': name,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+    }
+
+
+def run_wsgi(headers, concurrency, total):
+    def one_request(_):
+        client = Client()
+        start = time.perf_counter()
+        response = client.post('/graphql/sync/', {'query': QUERY}, content_type='application/json', headers=headers)
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one_request, range(total)))
+    return summarize('wsgi (sync view)', latencies, time.perf_counter() - start)
+
+
+async def run_asgi(headers, concurrency, total):
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                '/graphql/async/', {'query': QUERY}, content_type='application/json', headers=headers
+            )
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[one_request() for _ in range(total)])
+    return summarize('asgi (async view)', latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+    args = parser.parse_args()
+
+    settings.ROOT_URLCONF = __name__
+    # A file-backed test database so every thread sees the seeded rows
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        headers = seed(args.recipes, args.ingredients_per_recipe)
+        connection.close()
+        # Keep per-request response logging out of the measurement
+        logging.getLogger('recipes').setLevel(logging.WARNING)
+        logging.getLogger('recipes.graphql').setLevel(logging.WARNING)
+
+        results = [
+            run_wsgi(headers, args.concurrency, args.requests),
+            asyncio.run(run_asgi(headers, args.concurrency, args.requests)),
+        ]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{'stack':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(
+            f"{result['stack']:<20} {result['requests_per_second']:>8} "
+            f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""
+Concurrent load generator for a running server (runserver, gunicorn, uvicorn).
+
+N virtual users each keep one HTTP/1.1 keep-alive connection open and send
+requests back to back. Requests come either from a weighted mix of the
+example GraphQL operations in run_graphql_queries.py plus REST reads, or
+from a captured-traffic file that is replayed in order:
+
+    python benchmarks/load.py --users 32 --duration 30 --output before.json
+    python benchmarks/load.py --mix list_ingredients=3,rest_get_recipe=1 --requests 5000
+    python benchmarks/load.py --replay traffic.jsonl --users 16 --loop
+
+Replay files are JSON lines: {"method": "GET", "path": "/api/recipes/"} for
+REST calls (with an optional "body"), or {"query": ..., "variables": ...,
+"operationName": ...} for GraphQL requests. An optional "name" groups lines
+in the report.
+
+The report is JSON: throughput, p50/p95/p99 latency and error counts,
+overall and per operation, plus the git commit, so runs can be compared
+across commits. Only the standard library is used.
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import cycle
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from run_graphql_queries import OPERATIONS
+
+GRAPHQL_PATH = '/graphql/'
+
+REST_OPERATIONS = [
+    ('rest_list_recipes', 'GET', '/api/recipes/'),
+    ('rest_get_recipe', 'GET', '/api/recipes/1/'),
+    ('rest_list_ingredients', 'GET', '/api/ingredients/'),
+    ('rest_search_ingredients', 'GET', '/api/ingredients/search/?name=sa&limit=10'),
+]
+
+# Read-heavy by default; writes are in the mix but rare
+DEFAULT_MIX = (
+    'list_ingredients=4,search_recipes=4,rest_list_recipes=3,rest_get_recipe=3,'
+    'rest_list_ingredients=2,rest_search_ingredients=2,create_ingredient=1,update_recipe=1'
+)
+
+
+class Request:
+    def __init__(self, name, method, path, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = None if body is None else json.dumps(body).encode()
+
+
+def mix_requests():
+    requests = {
+        name: Request(name, 'POST', GRAPHQL_PATH, {'query': query, 'variables': variables or {}})
+        for name, query, variables in OPERATIONS
+    }
+    requests.update((name, Request(name, method, path)) for name, method, path in REST_OPERATIONS)
+    return requests
+
+
+def parse_mix(text, requests):
+    weights = {}
+    for item in filter(None, text.split(',')):
+        name, _, weight = item.partition('=')
+        if name not in requests:
+            raise SystemExit(f"Unknown operation '{name}'. Known: {', '.join(sorted(requests))}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def load_replay(path):
+    requests = []
+    with open(path) as replay:
+        for line in replay:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'query' in entry:
+                body = {key: entry[key] for key in ('query', 'variables', 'operationName') if key in entry}
+                name = entry.get('name') or entry.get('operationName') or 'graphql'
+                requests.append(Request(name, 'POST', GRAPHQL_PATH, body))
+            else:
+                name = entry.get('name') or f"{entry['method']} {entry['path']}"
+                requests.append(Request(name, entry['method'].upper(), entry['path'], entry.get('body')))
+    return requests
+
+
+class Connection:
+    # Minimal HTTP/1.1 client over one keep-alive connection
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.host_header = parts.netloc
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body=None):
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            try:
+                return await self._exchange(method, path, headers, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server closed an idle keep-alive connection; reconnect once
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host_header}', 'Connection: keep-alive']
+        lines += [f'{key}: {value}' for key, value in headers.items()]
+        if body is not None:
+            lines += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = b''
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                content += await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        elif status in (204, 304):
+            content = b''
+        else:
+            content = await self.reader.read()
+            response_headers['connection'] = 'close'
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+async def get_token(url, username, password):
+    connection = Connection(url)
+    body = json.dumps({'username': username, 'password': password}).encode()
+    status, content = await connection.request('POST', '/api/login/', {}, body)
+    await connection.close()
+    if status != 200:
+        raise SystemExit(f'Login failed ({status}): {content[:200]!r}')
+    return json.loads(content)['access']
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'requests_per_second': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        **{
+            f'p{int(fraction * 100)}_ms': round(percentile(latencies, fraction) * 1000, 2) if latencies else None
+            for fraction in (0.5, 0.95, 0.99)
+        },
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    token = args.token or await get_token(args.url, args.username, args.password)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    if args.replay:
+        replay = load_replay(args.replay)
+        source = cycle(replay) if args.loop else iter(replay)
+        next_request = lambda: next(source, None)
+    else:
+        requests = mix_requests()
+        weights = parse_mix(args.mix, requests)
+        rng = random.Random(args.seed)
+        names, name_weights = list(weights), list(weights.values())
+        next_request = lambda: requests[rng.choices(names, name_weights)[0]]
+
+    samples = {}
+    budget = {'remaining': None if args.requests is None else args.requests + args.warmup, 'warmup': args.warmup}
+    deadline = None
+
+    async def virtual_user():
+        connection = Connection(args.url)
+        try:
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if budget['remaining'] is not None:
+                    if budget['remaining'] <= 0:
+                        return
+                    budget['remaining'] -= 1
+                request = next_request()
+                if request is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    status, content = await connection.request(request.method, request.path, headers, request.body)
+                    ok = status < 400 and not (request.path == GRAPHQL_PATH and b'"errors"' in content)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    ok = False
+                    await connection.close()
+                latency = time.perf_counter() - start
+                if budget['warmup'] > 0:
+                    budget['warmup'] -= 1
+                    continue
+                samples.setdefault(request.name, []).append((latency, ok))
+        finally:
+            await connection.close()
+
+    start = time.perf_counter()
+    if args.duration:
+        deadline = start + args.duration
+    await asyncio.gather(*[virtual_user() for _ in range(args.users)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        'commit': git_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'url': args.url, 'users': args.users, 'duration': args.duration, 'requests': args.requests,
+            'warmup': args.warmup, 'mix': None if args.replay else args.mix, 'replay': args.replay, 'seed': args.seed,
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'overall': summarize([sample for values in samples.values() for sample in values], elapsed),
+        'operations': {name: summarize(values, elapsed) for name, values in sorted(samples.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--token', help='Use this access token instead of logging in')
+    parser.add_argument('--users', type=int, default=16, help='Concurrent virtual users (connections)')
+    parser.add_argument('--duration', type=float, help='Seconds to run (default: until --requests are sent)')
+    parser.add_argument('--requests', type=int, help='Total requests to send')
+    parser.add_argument('--warmup', type=int, default=0, help='Requests sent first and left out of the report')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Weighted operations, name=weight,...')
+    parser.add_argument('--replay', help='JSON-lines file of captured requests, sent in order')
+    parser.add_argument('--loop', action='store_true', help='Replay the file until --duration/--requests run out')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    if not args.duration and not args.requests and not (args.replay and not args.loop):
+        args.requests = 1000
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+        overall = report['overall']
+        print(f"{overall['requests']} requests, {overall['errors']} errors, {overall['requests_per_second']} req/s, "
+              f"p50 {overall['p50_ms']} ms, p95 {overall['p95_ms']} ms, p99 {overall['p99_ms']} ms")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
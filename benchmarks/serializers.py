@@ -0,0 +1,120 @@
+"""
+Microbenchmark: serializations per second of the list serializers, ModelSerializer
+against the values()-based ValuesSerializer (recipes/values_serializers.py).
+
+Runs in-process against a throwaway database seeded by this script:
+
+    python benchmarks/serializers.py --rows 10000 --repeat 5
+
+For IngredientSerializer and RecipeSerializer (with its nested ingredients) it
+times, over the same `rows` rows:
+
+- serialize: turning already-fetched rows into data (model instances with
+  their ingredients prefetched through the ModelSerializer, values() dicts
+  through the ValuesSerializer, which still runs its nested ingredients query)
+- end to end: the queries plus serialization, as a list endpoint runs them
+
+and checks that both produce the same JSON bytes. The best of `repeat` runs
+is reported.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipe_manager.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.serializers import IngredientSerializer, RecipeSerializer
+from recipes.values_serializers import INGREDIENT_VALUES, RECIPE_VALUES
+
+
+def seed(rows, ingredients_per_recipe):
+    user = User.objects.create_user(username='benchmark', password='benchmark')
+    ingredients = Ingredient.objects.bulk_create(
+        [Ingredient(name=f'Ingredient {i}', unit='g') for i in range(rows)]
+    )
+    created = Recipe.objects.bulk_create(
+        [Recipe(name=f'Recipe {i}', description='Benchmark recipe ' * 20, created_by=user) for i in range(rows)]
+    )
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredients[(recipe.id * 7 + offset) % len(ingredients)], quantity=1)
+        for recipe in created
+        for offset in range(ingredients_per_recipe)
+    ], batch_size=5000)
+
+
+def best_of(repeat, run):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def measure(name, serializer_class, values_serializer, queryset, rows, repeat):
+    instances = list(queryset)
+    values = list(values_serializer.queryset(queryset))
+    cases = {
+        'serialize': (
+            lambda: serializer_class(instances, many=True).data,
+            lambda: values_serializer.to_representation(values),
+        ),
+        'end to end': (
+            lambda: serializer_class(queryset.all(), many=True).data,
+            lambda: values_serializer.to_representation(values_serializer.queryset(queryset.all())),
+        ),
+    }
+    results = []
+    for case, (model_run, values_run) in cases.items():
+        model_seconds, model_data = best_of(repeat, model_run)
+        values_seconds, values_data = best_of(repeat, values_run)
+        assert JSONRenderer().render(model_data) == JSONRenderer().render(values_data), f'{name}: output differs'
+        results.append((name, case, rows / model_seconds, rows / values_seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        logging.getLogger('django.db.backends').setLevel(logging.WARNING)
+        seed(args.rows, args.ingredients_per_recipe)
+        results = measure(
+            'ingredients', IngredientSerializer, INGREDIENT_VALUES, Ingredient.objects.all(), args.rows, args.repeat,
+        ) + measure(
+            'recipes', RecipeSerializer, RECIPE_VALUES, Recipe.objects.prefetch_related('ingredients'), args.rows,
+            args.repeat,
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{'serializer':<12} {'case':<11} {'model rows/s':>13} {'values rows/s':>14} {'speedup':>8}")
+    for name, case, model_rate, values_rate in results:
+        print(f'{name:<12} {case:<11} {model_rate:>13.0f} {values_rate:>14.0f} {values_rate / model_rate:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""
+Compare the default SQLite setup with the production profile
+(SQLITE_PRODUCTION=True: WAL, pragmas, immediate write transactions and a
+read-only connection for reads) under concurrent readers and writers.
+
+Each profile runs in its own process against a fresh database file:
+
+    python benchmarks/sqlite_concurrency.py --readers 16 --writers 4 --duration 10
+
+Readers alternate GET /api/recipes/<id>/ and a GraphQL recipes query; writers
+send the updateRecipe mutation, which reads and then rewrites a recipe's
+ingredients in one transaction. Every reader and writer is a separate
+process (like WSGI worker processes) sending requests back to back through
+Django's test client. Failed requests (mostly "database is locked") are
+counted, not retried.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import multiprocessing
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROFILES = {
+    'default': {'SQLITE_PRODUCTION': 'False'},
+    'production': {'SQLITE_PRODUCTION': 'True'},
+}
+
+READ_QUERY = 'query { recipes(limit: 20) { id name ingredientCount ingredients { quantity ingredient { name } } } }'
+WRITE_MUTATION = """
+mutation UpdateRecipe($id: Int!, $input: UpdateRecipeInput!) {
+  updateRecipe(id: $id, input: $input) { id ingredientCount }
+}
+"""
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 2) if quantiles else None,
+        'p95_ms': round(quantiles[94] * 1000, 2) if quantiles else None,
+        'p99_ms': round(quantiles[98] * 1000, 2) if quantiles else None,
+    }
+
+
+def run_profile(args):
+    # Runs inside the child process, with the profile's environment applied
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'recipe_manager.settings')
+    import django
+
+    django.setup()
+
+    import logging
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+    logging.getLogger('recipes').setLevel(logging.WARNING)
+    logging.getLogger('recipes.graphql').setLevel(logging.WARNING)
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user(username='benchmark', password='benchmark')
+    ingredients = Ingredient.objects.bulk_create([Ingredient(name=f'Ingredient {i}', unit='g') for i in range(200)])
+    recipes = Recipe.objects.bulk_create(
+        [Recipe(name=f'Recipe {i}', description='Benchmark recipe', created_by=user) for i in range(args.recipes)]
+    )
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredients[(recipe.id * 7 + offset) % len(ingredients)], quantity=1)
+        for recipe in recipes
+        for offset in range(8)
+    ])
+    recipe_ids = [recipe.id for recipe in recipes]
+    ingredient_ids = [ingredient.id for ingredient in ingredients]
+    headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+    connections.close_all()
+
+    def worker(kind, seed, deadline, queue):
+        rng = random.Random(seed)
+        client = Client(raise_request_exception=False)
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if kind == 'write':
+                variables = {'id': rng.choice(recipe_ids), 'input': {'ingredients': rng.sample(ingredient_ids, 8)}}
+                response = client.post(
+                    '/graphql/', {'query': WRITE_MUTATION, 'variables': variables},
+                    content_type='application/json', headers=headers,
+                )
+            elif rng.random() < 0.5:
+                response = client.get(f'/api/recipes/{rng.choice(recipe_ids)}/', headers=headers)
+            else:
+                response = client.post('/graphql/', {'query': READ_QUERY}, content_type='application/json', headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200 or b'"errors"' in response.content:
+                errors += 1
+        queue.put((kind, latencies, errors))
+
+    # Forked after setup so every worker starts with Django loaded and no open connections
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    kinds = ['read'] * args.readers + ['write'] * args.writers
+    start = time.perf_counter()
+    deadline = start + args.duration
+    processes = [context.Process(target=worker, args=(kind, i, deadline, queue)) for i, kind in enumerate(kinds)]
+    for process in processes:
+        process.start()
+    results = {'read': ([], 0), 'write': ([], 0)}
+    for _ in processes:
+        kind, latencies, errors = queue.get()
+        results[kind] = (results[kind][0] + latencies, results[kind][1] + errors)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    return {kind: summarize(latencies, errors, elapsed) for kind, (latencies, errors) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--recipes', type=int, default=500)
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args)))
+        return
+
+    reports = {}
+    for name, environment in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ, **environment,
+                'SQLITE_PATH': os.path.join(directory, 'benchmark.sqlite3'),
+                # Measure the database, not the response cache
+                'RECIPES_RESPONSE_CACHE_TIMEOUT': '0',
+                'AUTH_USER_CACHE_TTL': '60',
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, '--profile', name, *sys.argv[1:]],
+                env=env, cwd=directory, capture_output=True, text=True, check=True,
+            ).stdout
+            reports[name] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'profile':<12} {'kind':<6} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, report in reports.items():
+        for kind, result in report.items():
+            print(
+                f"{name:<12} {kind:<6} {result['requests_per_second']:>8} {result['errors']:>7} "
+                f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -14,14 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
-from recipes.views import CustomTokenObtainPairView, AuthenticatedGraphQLView
+from recipes.views import CustomTokenObtainPairView, AuthenticatedGraphQLView, AsyncAuthenticatedGraphQLView
 from recipes.api_views import IngredientViewSet, RecipeViewSet
+from recipes.openapi import schema_document_view
 from recipes.schema import schema
 
 # Create a router and register our viewsets with it
@@ -29,28 +31,32 @@ router = DefaultRouter()
 router.register(r'ingredients', IngredientViewSet)
 router.register(r'recipes', RecipeViewSet)
 
+# The async GraphQL view only pays off under an ASGI server (see asgi.py)
+graphql_view = AsyncAuthenticatedGraphQLView if settings.GRAPHQL_ASYNC else AuthenticatedGraphQLView
+
 # Swagger schema view
+api_info = openapi.Info(
+    title="Recipe Manager API",
+    default_version='v1',
+    description="API for managing recipes and ingredients",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@example.com"),
+    license=openapi.License(name="BSD License"),
+)
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Recipe Manager API",
-        default_version='v1',
-        description="API for managing recipes and ingredients",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@example.com"),
-        license=openapi.License(name="BSD License"),
-    ),
+    api_info,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', AuthenticatedGraphQLView.as_view(schema=schema)),
+    path('graphql/', graphql_view.as_view(schema=schema)),
     path('api/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/', include(router.urls)),
     
-    # Swagger URLs
-    path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    # Swagger URLs; the UIs load the precomputed document from schema-json
+    path('swagger<format>/', schema_document_view, name='schema-json'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
 from .models import Ingredient, Recipe, RecipeIngredient
+from .shopping_list import shopping_list
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
@@ -11,6 +13,17 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_by', 'ingredient_count', 'created_at', 'updated_at')
     search_fields = ('name', 'description')
     list_filter = ('created_by', 'created_at')
+    actions = ['show_shopping_list']
+
+    @admin.action(description='Shopping list for selected recipes')
+    def show_shopping_list(self, request, queryset):
+        recipe_ids = list(queryset.values_list('id', flat=True))
+        return TemplateResponse(request, 'admin/recipes/shopping_list.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Shopping list for {len(recipe_ids)} recipe(s)',
+            'units': shopping_list(dict.fromkeys(recipe_ids, 1)),
+        })
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
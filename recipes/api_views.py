@@ -1,36 +1,265 @@
+import io
+from decimal import Decimal
+from functools import partial
 from rest_framework import viewsets, permissions, serializers
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .async_support import iterate_in_thread
+from .db_router import read_alias
+from .documents import DocumentJSONRenderer, PrerenderedJSON, documents_enabled, paginated_documents, recipe_documents
+from .export import FORMATS as EXPORT_FORMATS, export_chunks
+from .importer import READERS as IMPORT_FORMATS, RecipeImporter, RecordError
 from .models import Ingredient, Recipe, RecipeIngredient
 from .serializers import IngredientSerializer, RecipeSerializer, RecipeIngredientSerializer
+from .pagination import RECIPE_KEYSETS, IngredientCursorPagination, RecipeCursorPagination, clamp_page_size
+from .search import ranked_search
+from .shopping_list import shopping_list, to_multipliers
+from .units import UNITS, scaled_recipe_ingredients
+from .values_serializers import INGREDIENT_VALUES, RECIPE_VALUES
+from .response_cache import RECIPE_LIST, cached_response, recipe_tag
+from . import services
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-class IngredientViewSet(viewsets.ModelViewSet):
+BATCH_RESPONSE = openapi.Response('Result for every submitted item, by index', openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'updated': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'failed': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'index': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'errors': openapi.Schema(type=openapi.TYPE_OBJECT),
+            },
+        )),
+    },
+))
+
+
+def validate_batch(serializer_class, data):
+    # Returns ([(index, validated_data)], {index: errors}) or raises ValidationError
+    if not isinstance(data, list):
+        raise serializers.ValidationError({'error': 'Expected a list of items'})
+    if len(data) > settings.RECIPES_MAX_BATCH_SIZE:
+        raise serializers.ValidationError({'error': f'At most {settings.RECIPES_MAX_BATCH_SIZE} items per request'})
+    valid, errors = [], {}
+    for index, item in enumerate(data):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+    return valid, errors
+
+
+def batch_response(valid, errors, results):
+    # Service results are positional over `valid`; map them back to request indexes
+    items = {index: {'index': index, 'errors': item_errors} for index, item_errors in errors.items()}
+    updated = 0
+    for (index, _), result in zip(valid, results):
+        if result.error:
+            items[index] = {'index': index, 'errors': {'non_field_errors': [result.error]}}
+        else:
+            items[index] = {'index': index, 'id': result.obj.id}
+            updated += not result.created
+    failed = sum('errors' in item for item in items.values())
+    return Response({
+        'created': len(items) - failed - updated,
+        'updated': updated,
+        'failed': failed,
+        'results': [items[index] for index in sorted(items)],
+    })
+
+class ValuesListMixin:
+    # Read-only responses built from values() rows by ``values_serializer`` (a
+    # ValuesSerializer with the same output as serializer_class); None serializes
+    # model instances as usual
+    values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.values_serializer.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.values_serializer.to_representation(queryset))
+        return self.get_paginated_response(self.values_serializer.to_representation(page))
+
+    def list_data(self, queryset):
+        if self.values_serializer is None:
+            return self.get_serializer(queryset, many=True).data
+        return self.values_serializer.to_representation(self.values_serializer.queryset(queryset))
+
+class IngredientViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    values_serializer = INGREDIENT_VALUES
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = IngredientCursorPagination
 
-    @action(detail=False, methods=['get'])
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('name', openapi.IN_QUERY, description='Search text; the last word matches as a prefix.', type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description='Maximum number of results, best match first.', type=openapi.TYPE_INTEGER),
+        ]
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
     def search(self, request):
         name = request.query_params.get('name', '')
-        queryset = self.queryset.filter(name__icontains=name)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        try:
+            limit = int(request.query_params.get('limit', ''))
+        except ValueError:
+            limit = None
+        queryset = ranked_search(self.get_queryset(), name, clamp_page_size(limit))
+        return Response(self.list_data(queryset))
+
+    @swagger_auto_schema(request_body=IngredientSerializer(many=True), responses={200: BATCH_RESPONSE})
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        valid, errors = validate_batch(IngredientSerializer, request.data)
+        results = services.bulk_create_ingredients([data for _, data in valid])
+        return batch_response(valid, errors, results)
 
 class AddIngredientSerializer(serializers.Serializer):
     ingredient_id = serializers.IntegerField(required=True)
     quantity = serializers.FloatField(required=False, default=1.0)
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class ShoppingListRecipeSerializer(serializers.Serializer):
+    recipe_id = serializers.IntegerField()
+    multiplier = serializers.DecimalField(
+        max_digits=10, decimal_places=3, min_value=Decimal('0.001'), required=False, default=Decimal('1'),
+        help_text='Serving multiplier; the same recipe may be listed more than once.',
+    )
+
+SHOPPING_LIST_RESPONSE = openapi.Response('Total quantity per ingredient, grouped by unit', openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'units': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'unit': openapi.Schema(type=openapi.TYPE_STRING),
+                'ingredients': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'name': openapi.Schema(type=openapi.TYPE_STRING),
+                        'quantity': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DECIMAL),
+                        'recipe_count': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    },
+                )),
+            },
+        )),
+    },
+))
+
+SCALE_RESPONSE = openapi.Response('Every recipe ingredient, scaled and converted', openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'ingredients': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'recipe_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'ingredient_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'name': openapi.Schema(type=openapi.TYPE_STRING),
+                'quantity': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DECIMAL),
+                'unit': openapi.Schema(type=openapi.TYPE_STRING),
+            },
+        )),
+    },
+))
+
+IMPORT_RESPONSE = openapi.Response('Counts for the import; errors lists the first failed records by line', openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        **{name: openapi.Schema(type=openapi.TYPE_INTEGER) for name in (
+            'records', 'skipped', 'recipes', 'recipe_ingredients', 'ingredients_created', 'failed', 'rows_per_second',
+        )},
+        'seconds': openapi.Schema(type=openapi.TYPE_NUMBER),
+        'errors': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'line': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'error': openapi.Schema(type=openapi.TYPE_STRING),
+            },
+        )),
+    },
+))
+
+# Columns the recipe list's keysets order and paginate by
+DOCUMENT_PAGE_FIELDS = sorted({name for keyset in RECIPE_KEYSETS.values() for name, _ in keyset.fields})
+
+class BulkRecipeSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    ingredients = AddIngredientSerializer(many=True, required=False)
+
+class RecipeViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Recipe.objects.prefetch_related('ingredients')
     serializer_class = RecipeSerializer
+    values_serializer = RECIPE_VALUES
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    renderer_classes = [DocumentJSONRenderer, BrowsableAPIRenderer]
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        for param, lookup in (('min_ingredients', 'gte'), ('max_ingredients', 'lte')):
+            value = self.request.query_params.get(param)
+            if value:
+                if not value.isdigit():
+                    raise serializers.ValidationError({param: 'Expected a non-negative integer.'})
+                queryset = queryset.filter(**{f'ingredient_count__{lookup}': int(value)})
+        return queryset
+
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[*RECIPE_KEYSETS],
+                          description='Sort order; newest first by default.'),
+        openapi.Parameter('min_ingredients', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='Only recipes with at least this many ingredients.'),
+        openapi.Parameter('max_ingredients', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='Only recipes with at most this many ingredients.'),
+    ])
+    def list(self, request, *args, **kwargs):
+        render = self.list_documents if documents_enabled() else super().list
+        return cached_response(request, [RECIPE_LIST], partial(render, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs.get(self.lookup_field, '')
+        if not str(lookup).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        render = self.retrieve_document if documents_enabled() else super().retrieve
+        return cached_response(request, [recipe_tag(int(lookup))], partial(render, request, *args, **kwargs))
+
+    def list_documents(self, request, *args, **kwargs):
+        # The page query only needs the keyset columns; the bodies come from the documents
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).only(*DOCUMENT_PAGE_FIELDS)
+        page = self.paginate_queryset(queryset)
+        documents = recipe_documents([recipe.id for recipe in page])
+        envelope = self.get_paginated_response([]).data
+        return Response(paginated_documents(envelope, [documents[recipe.id] for recipe in page if recipe.id in documents]))
+
+    def retrieve_document(self, request, *args, **kwargs):
+        recipe_id = int(kwargs[self.lookup_field])
+        document = recipe_documents([recipe_id]).get(recipe_id)
+        if document is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(PrerenderedJSON(document))
+
     @swagger_auto_schema(
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -81,4 +310,128 @@ class RecipeViewSet(viewsets.ModelViewSet):
             recipe_ingredient.delete()
             return Response({'status': 'ingredient removed'})
         except RecipeIngredient.DoesNotExist:
-            return Response({'error': 'Recipe ingredient not found'}, status=status.HTTP_404_NOT_FOUND) 
\ No newline at end of file
+            return Response({'error': 'Recipe ingredient not found'}, status=status.HTTP_404_NOT_FOUND) 
+
+    @swagger_auto_schema(request_body=BulkRecipeSerializer(many=True), responses={200: BATCH_RESPONSE})
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        valid, errors = validate_batch(BulkRecipeSerializer, request.data)
+        results = services.bulk_create_recipes(
+            [
+                {
+                    'name': data['name'],
+                    'description': data['description'],
+                    'quantities': {item['ingredient_id']: item['quantity'] for item in data.get('ingredients', [])},
+                }
+                for _, data in valid
+            ],
+            created_by=request.user,
+        )
+        return batch_response(valid, errors, results)
+
+    @swagger_auto_schema(request_body=AddIngredientSerializer(many=True), responses={200: BATCH_RESPONSE})
+    @action(detail=True, methods=['post'])
+    def add_ingredients(self, request, pk=None):
+        recipe = self.get_object()
+        valid, errors = validate_batch(AddIngredientSerializer, request.data)
+        results = services.bulk_add_ingredients([
+            {'recipe_id': recipe.id, 'ingredient_id': data['ingredient_id'], 'quantity': data['quantity']}
+            for _, data in valid
+        ])
+        return batch_response(valid, errors, results)
+
+    @swagger_auto_schema(request_body=ShoppingListRecipeSerializer(many=True), responses={200: SHOPPING_LIST_RESPONSE})
+    @action(detail=False, methods=['post'])
+    def shopping_list(self, request):
+        units = shopping_list(self.validated_multipliers(request.data))
+        for group in units:
+            for item in group['ingredients']:
+                item['quantity'] = str(item['quantity'])
+        return Response({'units': units})
+
+    @swagger_auto_schema(
+        request_body=ShoppingListRecipeSerializer(many=True),
+        manual_parameters=[
+            openapi.Parameter(
+                'to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="'base' (g, ml, piece) or a unit code; omit to keep each ingredient's unit.",
+            ),
+        ],
+        responses={200: SCALE_RESPONSE},
+    )
+    @action(detail=False, methods=['post'])
+    def scale(self, request):
+        to = request.query_params.get('to') or None
+        if to not in (None, 'base', *UNITS):
+            raise serializers.ValidationError({'to': f"Unknown unit '{to}'. Use 'base' or one of: {', '.join(UNITS)}."})
+        multipliers = self.validated_multipliers(request.data)
+        rows = scaled_recipe_ingredients(multipliers, to)
+        for row in rows:
+            row['quantity'] = f"{row['quantity']:.2f}"
+        return Response({'ingredients': rows})
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv'], default='ndjson',
+                description='ndjson: one recipe per line with its ingredients; csv: one row per recipe ingredient.',
+            ),
+        ],
+        responses={200: 'The whole recipe catalogue, streamed in id order'},
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def export(self, request):
+        # Not ?format=: DRF reads that one to pick a renderer
+        output = request.query_params.get('output') or 'ndjson'
+        if output not in EXPORT_FORMATS:
+            raise serializers.ValidationError({'output': f"Unknown output '{output}'. Use one of: {', '.join(EXPORT_FORMATS)}."})
+        # The body is generated after the view returns, outside the request's routing context
+        chunks = export_chunks(output, using=read_alias())
+        if isinstance(request._request, ASGIRequest):
+            chunks = iterate_in_thread(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="recipes.{output}"'
+        return response
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description='NDJSON or CSV in the layout the export endpoint writes.'),
+            openapi.Parameter('input', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv'],
+                              description='Defaults to the extension of the uploaded file name.'),
+            openapi.Parameter('job', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Checkpoint name; uploading the same file under the same job resumes it.'),
+        ],
+        responses={200: IMPORT_RESPONSE},
+    )
+    @action(detail=False, methods=['post'], url_path='import', url_name='import', parser_classes=[MultiPartParser])
+    def import_recipes(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise serializers.ValidationError({'file': 'Upload the recipes as a "file" form field.'})
+        input_format = request.query_params.get('input') or upload.name.rpartition('.')[2].lower()
+        if input_format not in IMPORT_FORMATS:
+            raise serializers.ValidationError({'input': f"Unknown input '{input_format}'. Use one of: {', '.join(IMPORT_FORMATS)}."})
+        job = request.query_params.get('job')
+        importer = RecipeImporter(
+            default_user=request.user,
+            # Job names are per user; only staff may attribute recipes to other users
+            job=f'{request.user.pk}:{job}' if job else None,
+            keep_authors=request.user.is_staff,
+        )
+        # Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk and read back line by line
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        try:
+            stats = importer.run(stream, input_format)
+        except (RecordError, UnicodeDecodeError) as error:
+            raise serializers.ValidationError({'file': str(error)})
+        finally:
+            stream.detach()
+        return Response(stats.as_dict())
+
+    def validated_multipliers(self, data):
+        if isinstance(data, list) and len(data) > settings.RECIPES_MAX_BATCH_SIZE:
+            raise serializers.ValidationError({'error': f'At most {settings.RECIPES_MAX_BATCH_SIZE} items per request'})
+        serializer = ShoppingListRecipeSerializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return to_multipliers((item['recipe_id'], item['multiplier']) for item in serializer.validated_data)
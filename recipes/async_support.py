@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import inspect
+
+from asgiref.sync import sync_to_async
+
+# The GraphQL resolvers are shared by the sync view (WSGI) and the async view
+# (ASGI). Under the async view they run on the event loop, where the sync ORM
+# raises SynchronousOnlyOperation, so they return coroutines there instead.
+
+
+def in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def iterate_in_thread(iterator):
+    # A sync iterator (e.g. one running ORM queries) as an async one, each item
+    # produced in a worker thread. StreamingHttpResponse needs this under ASGI:
+    # given a sync iterator there, it reads the whole body into memory first.
+    iterator = iter(iterator)
+    done = object()
+    next_item = sync_to_async(next)
+    while (item := await next_item(iterator, done)) is not done:
+        yield item
+
+
+def thread_when_async(resolver):
+    # Runs a sync resolver (typically a transactional write, which Django only
+    # supports in sync code) in a worker thread when called on the event loop.
+    @functools.wraps(resolver)
+    def wrapper(*args, **kwargs):
+        if in_event_loop():
+            return sync_to_async(resolver)(*args, **kwargs)
+        return resolver(*args, **kwargs)
+    return wrapper
+
+
+def then(result, callback):
+    # callback(result) for plain values, a coroutine doing the same for awaitables
+    if inspect.isawaitable(result):
+        async def chain():
+            return callback(await result)
+        return chain()
+    return callback(result)
+
+
+def get_first(queryset):
+    return queryset.afirst() if in_event_loop() else queryset.first()
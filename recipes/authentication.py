@@ -0,0 +1,85 @@
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+class AuthenticatedUserCache:
+    # Process-local token -> user map. Entries live until the token expires or
+    # AUTH_USER_CACHE_TTL passes, whichever is first; the TTL bounds how long
+    # another worker process can keep serving a user it has not been told about.
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (user, expires_at)
+        self._keys_by_user = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+        # Every request gets its own instance; attributes set on request.user stay local
+        return copy.copy(user)
+
+    def set(self, key, user, token_expires_at):
+        expires_at = min(token_expires_at, time.time() + settings.AUTH_USER_CACHE_TTL)
+        with self._lock:
+            self._entries[key] = (user, expires_at)
+            self._entries.move_to_end(key)
+            self._keys_by_user[user.pk].add(key)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        user, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(user.pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user.pk]
+
+
+user_cache = AuthenticatedUserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips the per-request User lookup for known tokens.
+
+    Used by DRF (REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']) and by the
+    GraphQL views. Cached users are dropped when the User row is saved or
+    deleted (see recipes.signals), so deactivation and password changes take
+    effect immediately in this process.
+    """
+
+    def get_user(self, validated_token):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return super().get_user(validated_token)
+        key = validated_token.get(api_settings.JTI_CLAIM) or str(validated_token)
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user, validated_token['exp'])
+        return user
+
+    def authenticate_token(self, raw_token):
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_user(validated_token), validated_token
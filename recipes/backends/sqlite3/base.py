@@ -0,0 +1,37 @@
+"""
+SQLite backend for the production profile (settings.SQLITE_PRODUCTION).
+
+Two extra OPTIONS on top of Django's sqlite3 backend:
+
+- ``pragmas``: ``{name: value}`` run on every new connection, e.g.
+  ``{'journal_mode': 'WAL', 'synchronous': 'NORMAL'}``.
+- ``transaction_mode``: ``'IMMEDIATE'`` makes ``atomic()`` take the write lock
+  when the transaction starts. A deferred transaction that reads first and
+  writes later fails with "database is locked" straight away when another
+  writer got in between; an immediate one waits up to ``busy_timeout``.
+"""
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = {'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is None:
+            return super()._start_transaction_under_autocommit()
+        if mode.upper() not in TRANSACTION_MODES:
+            raise ValueError(f'Unknown SQLite transaction_mode {mode!r}.')
+        self.cursor().execute(f'BEGIN {mode.upper()}')
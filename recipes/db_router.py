@@ -0,0 +1,95 @@
+"""
+Send read traffic to the read-only database alias (settings.RECIPES_READ_DATABASE).
+
+Only reads made while serving a GET/HEAD/OPTIONS request or a GraphQL query
+operation are routed there (``read`` in the SQLite production profile); everything else, including reads inside a write
+transaction, stays on ``default`` so a request always sees its own writes.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+from graphql import OperationType
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_only = ContextVar('recipes_read_only', default=False)
+
+
+@contextmanager
+def read_only(enabled=True):
+    """Route reads in this block (and code it calls) to the read alias."""
+    token = _read_only.set(enabled)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+@contextmanager
+def consistent_reads():
+    """Route reads in this block to ``default`` when the read alias may lag behind it.
+
+    For reads cached under versions bumped on ``default``: a lagging replica
+    could return rows from before the write that bumped them.
+    """
+    previous = _read_only.get()
+    if settings.RECIPES_READ_DATABASE_LAGS:
+        _read_only.set(False)
+    try:
+        yield
+    finally:
+        _read_only.set(previous)
+
+
+def read_alias():
+    alias = settings.RECIPES_READ_DATABASE
+    if alias and _read_only.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return alias
+    return None
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != settings.RECIPES_READ_DATABASE
+
+
+@sync_and_async_middleware
+def read_only_routing_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with read_only(request.method in SAFE_METHODS):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with read_only(request.method in SAFE_METHODS):
+                return get_response(request)
+    return middleware
+
+
+class ReadOnlyQueryExtension(SchemaExtension):
+    # GraphQL reads arrive as POSTs; route query operations like GET requests
+    def on_execute(self):
+        execution_context = self.execution_context
+        operation = get_operation_ast(execution_context.graphql_document, execution_context.operation_name)
+        previous = _read_only.get()
+        _read_only.set(operation is not None and operation.operation == OperationType.QUERY)
+        try:
+            yield
+        finally:
+            _read_only.set(previous)
@@ -0,0 +1,138 @@
+"""
+Pre-rendered recipe documents for the REST recipe list and detail views.
+
+Each recipe has a RecipeDocument row holding its RecipeSerializer output as
+JSON text (rendered through RECIPE_VALUES, which gives the same bytes).
+Database triggers (migration 0008) mark it stale on any change to the recipe,
+its RecipeIngredient rows or its ingredients, so bulk, raw and cascading
+writes are covered too. A read splices the stored bodies into the
+response bytes; stale ones are rendered again, for just those recipes, and
+written back before they are served.
+
+A document is only stored under the generation read before its data was:
+``UPDATE ... WHERE generation = <read>`` does nothing when a write made it
+stale again in between, so a slow reader never stores an outdated body.
+"""
+import json
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, Value, When
+from rest_framework.renderers import JSONRenderer
+
+from .models import Recipe, RecipeDocument
+from .values_serializers import RECIPE_VALUES
+
+REBUILD_CHUNK_SIZE = 500
+# Backends with the staleness triggers from migration 0008
+TRIGGER_VENDORS = ('sqlite', 'postgresql')
+
+
+def documents_enabled(using=DEFAULT_DB_ALIAS):
+    return settings.RECIPES_DOCUMENTS and connections[using].vendor in TRIGGER_VENDORS
+
+
+class PrerenderedJSON:
+    """Response data that is already JSON; DocumentJSONRenderer writes it out unchanged.
+
+    Indexing it (``response.data['results']``) parses the JSON, for code that
+    inspects response data rather than rendering it.
+    """
+
+    def __init__(self, content):
+        self.content = content
+
+    def __eq__(self, other):
+        return isinstance(other, PrerenderedJSON) and other.content == self.content
+
+    def __getitem__(self, key):
+        return self.parse()[key]
+
+    def parse(self):
+        return json.loads(self.content)
+
+
+class DocumentJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, PrerenderedJSON):
+            if self.get_indent(accepted_media_type, renderer_context or {}) is None:
+                return data.content
+            # The browsable API and ?indent= want it pretty-printed
+            data = data.parse()
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def render_documents(recipe_ids, using=None):
+    """``{recipe_id: json_text}`` of the recipes that exist among ``recipe_ids``."""
+    renderer = JSONRenderer()
+    rows = RECIPE_VALUES.queryset(Recipe.objects.using(using).filter(id__in=recipe_ids))
+    return {item['id']: renderer.render(item).decode() for item in RECIPE_VALUES.to_representation(rows, using)}
+
+
+def build_documents(generations, using=None):
+    """Render the recipes in ``{recipe_id: generation}`` and store each body under that generation.
+
+    Returns ``{recipe_id: json_text}`` for the recipes that exist.
+    """
+    bodies = render_documents(generations, using)
+    stored = [recipe_id for recipe_id in bodies if generations[recipe_id] is not None]
+    if stored:
+        # One UPDATE; a document made stale again since its generation was read is left alone
+        RecipeDocument.objects.db_manager(using).filter(recipe_id__in=stored).filter(generation=Case(
+            *[When(recipe_id=recipe_id, then=Value(generations[recipe_id])) for recipe_id in stored]
+        )).update(
+            body=Case(*[When(recipe_id=recipe_id, then=Value(bodies[recipe_id])) for recipe_id in stored]),
+            built_generation=F('generation'),
+        )
+    return bodies
+
+
+def recipe_documents(recipe_ids, using=None):
+    """``{recipe_id: bytes}`` of current documents, building the stale ones; missing recipes are left out."""
+    documents, stale = {}, dict.fromkeys(recipe_ids)
+    # Generations are read before any recipe data (see the module docstring)
+    for recipe_id, generation, built_generation, body in RecipeDocument.objects.using(using).filter(
+        recipe_id__in=stale
+    ).values_list('recipe_id', 'generation', 'built_generation', 'body'):
+        if generation == built_generation:
+            documents[recipe_id] = body.encode()
+            del stale[recipe_id]
+        else:
+            stale[recipe_id] = generation
+    if stale:
+        documents.update((recipe_id, body.encode()) for recipe_id, body in build_documents(stale, using).items())
+    return documents
+
+
+def paginated_documents(envelope, documents):
+    """The rendered paginated response ``envelope`` with ``documents`` (bytes) spliced in as its results."""
+    head = JSONRenderer().render({**envelope, 'results': []})
+    # results is the envelope's last key
+    return PrerenderedJSON(head[:-len(b'[]}')] + b'[' + b','.join(documents) + b']}')
+
+
+def stale_documents(using=DEFAULT_DB_ALIAS, chunk_size=REBUILD_CHUNK_SIZE, everything=False):
+    """Yield ``{recipe_id: generation}`` per id range of ``chunk_size`` documents that need building."""
+    documents = RecipeDocument.objects.using(using).order_by('recipe_id')
+    last_id = 0
+    while True:
+        rows = list(documents.filter(recipe_id__gt=last_id).values_list(
+            'recipe_id', 'generation', 'built_generation'
+        )[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        stale = {
+            recipe_id: generation for recipe_id, generation, built_generation in rows
+            if everything or generation != built_generation
+        }
+        if stale:
+            yield stale
+
+
+def rebuild_documents(using=DEFAULT_DB_ALIAS, chunk_size=REBUILD_CHUNK_SIZE, everything=False):
+    """Build every stale document (or all of them); returns the number built."""
+    built = 0
+    for stale in stale_documents(using, chunk_size, everything):
+        built += len(build_documents(stale, using))
+    return built
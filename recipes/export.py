@@ -0,0 +1,94 @@
+"""
+Streaming export of the whole recipe catalogue as NDJSON or CSV.
+
+Recipes are read in keyset chunks (id > last id, CHUNK_SIZE at a time) with
+the ingredients of each chunk fetched in one more query, as plain tuples, so
+memory use depends on the chunk size and not on the size of the table. Every
+chunk is a short query of its own: no cursor or read transaction stays open
+for the whole export.
+
+NDJSON has one recipe per line with its ingredients nested; CSV has one row
+per recipe ingredient (recipe columns repeated, ingredient columns empty for
+recipes without ingredients). import_recipes reads both.
+"""
+import csv
+import io
+import json
+from itertools import groupby
+
+from .models import Recipe, RecipeIngredient
+
+CHUNK_SIZE = 1000
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_COLUMNS = [
+    'recipe_id', 'name', 'description', 'created_by', 'created_at', 'updated_at',
+    'ingredient_name', 'ingredient_unit', 'quantity',
+]
+
+
+def recipe_chunks(chunk_size=CHUNK_SIZE, using=None):
+    """Yield lists of ``(recipe_row, [(ingredient_name, unit, quantity), ...])`` in id order."""
+    recipes = Recipe.objects.using(using).order_by('id').values_list(
+        'id', 'name', 'description', 'created_by__username', 'created_at', 'updated_at'
+    )
+    last_id = 0
+    while True:
+        rows = list(recipes.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        ingredients = (
+            RecipeIngredient.objects.using(using)
+            .filter(recipe_id__gte=rows[0][0], recipe_id__lte=last_id)
+            .order_by('recipe_id', 'id')
+            .values_list('recipe_id', 'ingredient__name', 'ingredient__unit', 'quantity')
+        )
+        by_recipe = {
+            recipe_id: [item[1:] for item in items]
+            for recipe_id, items in groupby(ingredients, key=lambda item: item[0])
+        }
+        yield [(row, by_recipe.get(row[0], [])) for row in rows]
+        if len(rows) < chunk_size:
+            return
+
+
+def ndjson_chunks(chunks):
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps({
+                'id': recipe_id,
+                'name': name,
+                'description': description,
+                'created_by': created_by,
+                'created_at': created_at.isoformat(),
+                'updated_at': updated_at.isoformat(),
+                'ingredients': [
+                    {'name': ingredient, 'unit': unit, 'quantity': str(quantity)}
+                    for ingredient, unit, quantity in ingredients
+                ],
+            }, ensure_ascii=False) + '\n'
+            for (recipe_id, name, description, created_by, created_at, updated_at), ingredients in chunk
+        ).encode()
+
+
+def csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(CSV_COLUMNS)
+    for chunk in chunks:
+        for (recipe_id, name, description, created_by, created_at, updated_at), ingredients in chunk:
+            recipe = [recipe_id, name, description, created_by, created_at.isoformat(), updated_at.isoformat()]
+            for ingredient, unit, quantity in ingredients or [('', '', '')]:
+                writer.writerow(recipe + [ingredient, unit, quantity])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_chunks(format, chunk_size=CHUNK_SIZE, using=None):
+    """Encoded output for ``format`` ('ndjson' or 'csv'), one bytes block per chunk of recipes."""
+    chunks = recipe_chunks(chunk_size, using)
+    return ndjson_chunks(chunks) if format == 'ndjson' else csv_chunks(chunks)
@@ -0,0 +1,298 @@
+"""
+Streaming bulk import of recipes in the formats recipes.export writes.
+
+Records are parsed one at a time from a text stream and written
+CHUNK_SIZE recipes per transaction. Ingredients are resolved through an
+in-memory ``(name, unit) -> id`` map, filled with one query per chunk for the
+names it has not seen yet; missing ones are created in the same chunk.
+Recipes go in with one bulk_create, RecipeIngredients with multi-row INSERTs
+that skip rows conflicting with the (recipe, ingredient) unique constraint,
+so a repeated ingredient within a recipe is dropped rather than failing the
+chunk.
+
+Each chunk's transaction also advances an ImportCheckpoint row (number of
+input records consumed), so a job that dies part way is resumed by running it
+again under the same name: the committed records are skipped, none is
+written twice.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from .export import CSV_COLUMNS
+from .models import ImportCheckpoint, Ingredient, Recipe, RecipeIngredient
+from .response_cache import RECIPE_LIST, invalidate
+from .services import DEFAULT_QUANTITY, to_quantity
+from .units import normalize_unit
+
+CHUNK_SIZE = 2000
+MAX_ERRORS = 100
+MAX_QUANTITY = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+
+NAME_LENGTH = {
+    'recipe': Recipe._meta.get_field('name').max_length,
+    'ingredient': Ingredient._meta.get_field('name').max_length,
+}
+
+
+class RecordError(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    records: int = 0
+    skipped: int = 0
+    recipes: int = 0
+    recipe_ingredients: int = 0
+    ingredients_created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        # Rows written: recipes plus recipe ingredients
+        return (self.recipes + self.recipe_ingredients) / max(self.elapsed, 1e-9)
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'records': self.records,
+            'skipped': self.skipped,
+            'recipes': self.recipes,
+            'recipe_ingredients': self.recipe_ingredients,
+            'ingredients_created': self.ingredients_created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second),
+        }
+
+
+def ndjson_records(stream):
+    """``(line, dict)`` per non-blank line of an NDJSON stream; unparsable lines give ``(line, RecordError)``."""
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as error:
+            yield line, RecordError(f'Invalid JSON: {error}')
+            continue
+        yield line, record if isinstance(record, dict) else RecordError('Expected a JSON object')
+
+
+def csv_records(stream):
+    """``(line, dict)`` per recipe of a CSV stream: consecutive rows with the same recipe_id form one recipe."""
+    reader = csv.DictReader(stream)
+    missing = {'name', 'ingredient_name'} - set(reader.fieldnames or ())
+    if missing:
+        raise RecordError(f"CSV header must include {', '.join(sorted(missing))}; expected {', '.join(CSV_COLUMNS)}")
+    record = key = None
+    for row in reader:
+        row_key = row.get('recipe_id') or (row['name'], row.get('description'), row.get('created_by'))
+        if record is None or row_key != key:
+            if record is not None:
+                yield record
+            key = row_key
+            record = (reader.line_num, {
+                'name': row['name'],
+                'description': row.get('description') or '',
+                'created_by': row.get('created_by') or None,
+                'ingredients': [],
+            })
+        if row['ingredient_name']:
+            record[1]['ingredients'].append({
+                'name': row['ingredient_name'], 'unit': row.get('ingredient_unit'), 'quantity': row.get('quantity'),
+            })
+    if record is not None:
+        yield record
+
+
+READERS = {'ndjson': ndjson_records, 'csv': csv_records}
+
+
+def clean_record(record):
+    """``(name, description, username, [(ingredient_name, unit, quantity)])`` or RecordError."""
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise RecordError('Recipe name is required')
+    if len(name) > NAME_LENGTH['recipe']:
+        raise RecordError(f"Recipe name is longer than {NAME_LENGTH['recipe']} characters")
+    ingredients = record.get('ingredients') or []
+    if not isinstance(ingredients, list):
+        raise RecordError('ingredients must be a list')
+    cleaned = []
+    for item in ingredients:
+        if not isinstance(item, dict):
+            raise RecordError('Each ingredient must be an object')
+        ingredient = item.get('name')
+        if not isinstance(ingredient, str) or not ingredient.strip():
+            raise RecordError('Ingredient name is required')
+        if len(ingredient) > NAME_LENGTH['ingredient']:
+            raise RecordError(f"Ingredient name is longer than {NAME_LENGTH['ingredient']} characters")
+        unit = normalize_unit(item.get('unit') or '')
+        if unit is None:
+            raise RecordError(f"Unknown unit '{item.get('unit')}' for {ingredient}")
+        quantity = item.get('quantity')
+        try:
+            quantity = DEFAULT_QUANTITY if quantity in (None, '') else to_quantity(quantity)
+        except (InvalidOperation, ValueError):
+            raise RecordError(f"Invalid quantity '{item.get('quantity')}' for {ingredient}")
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise RecordError(f"Quantity out of range for {ingredient}")
+        cleaned.append((ingredient.strip(), unit, quantity))
+    return name, str(record.get('description') or ''), record.get('created_by') or None, cleaned
+
+
+def insert_recipe_ingredients(using, rows):
+    """Insert ``(recipe_id, ingredient_id, quantity)`` rows, skipping (recipe, ingredient) pairs that exist.
+
+    Multi-row INSERTs written with the backend's own conflict clause: building
+    RecipeIngredient instances and compiling them through bulk_create costs far
+    more than executing the SQL. Returns the number of rows inserted.
+    """
+    connection = connections[using]
+    ops = connection.ops
+    meta = RecipeIngredient._meta
+    fields = [meta.get_field(name) for name in ('recipe', 'ingredient', 'quantity', 'created_at', 'updated_at')]
+    now = ops.adapt_datetimefield_value(timezone.now())
+    batch_size = min(ops.bulk_batch_size(fields, rows), 1000)
+    statement = '%s %s (%s) VALUES ' % (
+        ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        ops.quote_name(meta.db_table),
+        ', '.join(ops.quote_name(field.column) for field in fields),
+    )
+    placeholder = '(%s)' % ', '.join(['%s'] * len(fields))
+    suffix = ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = []
+            for recipe_id, ingredient_id, quantity in batch:
+                params += [recipe_id, ingredient_id, ops.adapt_decimalfield_value(quantity), now, now]
+            cursor.execute(f"{statement}{', '.join([placeholder] * len(batch))} {suffix}", params)
+            inserted += cursor.rowcount
+    return inserted
+
+
+class RecipeImporter:
+    """Import recipes from a stream into ``using``.
+
+    Recipes are attributed to their ``created_by`` user when it exists (and
+    ``keep_authors`` is set) and to ``default_user`` otherwise.
+    ``progress(stats)`` is called after every chunk.
+    """
+
+    def __init__(self, default_user=None, job=None, chunk_size=CHUNK_SIZE, using=DEFAULT_DB_ALIAS, progress=None,
+                 keep_authors=True):
+        self.default_user_id = getattr(default_user, 'id', default_user)
+        self.keep_authors = keep_authors
+        self.job = job
+        self.chunk_size = chunk_size
+        self.using = using
+        self.progress = progress
+        self.user_ids = {}
+        self.ingredient_ids = {}
+
+    def run(self, stream, format):
+        stats = ImportStats()
+        records = READERS[format](stream)
+        position = 0
+        if self.job:
+            checkpoint, _ = ImportCheckpoint.objects.using(self.using).get_or_create(name=self.job)
+            for _ in range(checkpoint.position):
+                if next(records, None) is None:
+                    break
+                position += 1
+            stats.skipped = position
+        chunk = []
+        for line, record in records:
+            position += 1
+            stats.records += 1
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                chunk.append((line, *clean_record(record)))
+            except RecordError as error:
+                stats.error(line, str(error))
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk, position, stats)
+                chunk = []
+        self.write_chunk(chunk, position, stats)
+        return stats
+
+    def resolve_users(self, usernames):
+        unknown = {username for username in usernames if username not in self.user_ids}
+        if unknown:
+            found = dict(get_user_model().objects.using(self.using).filter(username__in=unknown).values_list('username', 'id'))
+            for username in unknown:
+                self.user_ids[username] = found.get(username, self.default_user_id)
+
+    def resolve_ingredients(self, keys):
+        names = {name for name, unit in keys if (name, unit) not in self.ingredient_ids}
+        if names:
+            # Lowest id wins for a (name, unit) that already exists more than once
+            for ingredient_id, name, unit in (
+                Ingredient.objects.using(self.using).filter(name__in=names).order_by('id').values_list('id', 'name', 'unit')
+            ):
+                self.ingredient_ids.setdefault((name, unit), ingredient_id)
+
+    def write_chunk(self, chunk, position, stats):
+        if self.keep_authors:
+            self.resolve_users({username for _, _, _, username, _ in chunk if username})
+        records = []
+        for line, name, description, username, items in chunk:
+            user_id = self.user_ids.get(username, self.default_user_id)
+            if user_id is None:
+                stats.error(line, f"Unknown user '{username}' and no default user" if username else 'created_by is required')
+            else:
+                records.append((name, description, user_id, items))
+        keys = dict.fromkeys((name, unit) for *_, items in records for name, unit, _ in items)
+        self.resolve_ingredients(keys)
+        new_keys = [key for key in keys if key not in self.ingredient_ids]
+        with transaction.atomic(using=self.using):
+            created = Ingredient.objects.using(self.using).bulk_create(
+                [Ingredient(name=name, unit=unit) for name, unit in new_keys]
+            )
+            ingredient_ids = dict(self.ingredient_ids)
+            ingredient_ids.update(zip(new_keys, (ingredient.id for ingredient in created)))
+            recipes = Recipe.objects.using(self.using).bulk_create([
+                Recipe(name=name, description=description, created_by_id=user_id)
+                for name, description, user_id, _ in records
+            ])
+            inserted = insert_recipe_ingredients(self.using, [
+                (recipe.id, ingredient_ids[name, unit], quantity)
+                for recipe, (*_, items) in zip(recipes, records)
+                for name, unit, quantity in items
+            ])
+            if self.job:
+                ImportCheckpoint.objects.using(self.using).filter(name=self.job).update(
+                    position=position, updated_at=timezone.now()
+                )
+        # Only ids from a committed transaction go into the shared map
+        self.ingredient_ids = ingredient_ids
+        stats.ingredients_created += len(created)
+        stats.recipes += len(recipes)
+        stats.recipe_ingredients += inserted
+        if recipes:
+            invalidate([RECIPE_LIST])
+        if self.progress:
+            self.progress(stats)
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from strawberry.dataloader import DataLoader
+from strawberry.django.context import StrawberryDjangoContext
+
+from . import models
+from .async_support import in_event_loop
+
+
+class BatchLoader:
+    # Per-request loader keyed by recipe id. Keys queued by the root resolvers
+    # are fetched together the first time any one of them is requested, so a
+    # list of N recipes costs a single IN (...) query instead of N.
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self.cache = {}
+        self.pending = set()
+
+    def prime(self, key, value):
+        self.cache[key] = value
+        self.pending.discard(key)
+
+    def queue(self, keys):
+        self.pending.update(key for key in keys if key not in self.cache)
+
+    def load(self, key):
+        if key not in self.cache:
+            keys = self.pending | {key}
+            self.pending = set()
+            self.cache.update(self.batch_load_fn(list(keys)))
+        return self.cache[key]
+
+
+def recipe_ingredients_queryset(recipe_ids):
+    # RecipeIngredientType exposes both sides of the row
+    return models.RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).select_related('ingredient', 'recipe')
+
+
+def group_by_recipe(recipe_ids, recipe_ingredients):
+    grouped = defaultdict(list)
+    for recipe_ingredient in recipe_ingredients:
+        grouped[recipe_ingredient.recipe_id].append(recipe_ingredient)
+    return {recipe_id: grouped[recipe_id] for recipe_id in recipe_ids}
+
+
+def load_recipe_ingredients(recipe_ids):
+    return group_by_recipe(recipe_ids, recipe_ingredients_queryset(recipe_ids))
+
+
+async def aload_recipe_ingredients(recipe_ids):
+    grouped = group_by_recipe(recipe_ids, [row async for row in recipe_ingredients_queryset(recipe_ids)])
+    return [grouped[recipe_id] for recipe_id in recipe_ids]
+
+
+class RecipeLoaders:
+    def __init__(self):
+        self.ingredients = BatchLoader(load_recipe_ingredients)
+
+    def prepare(self, recipes):
+        # Evaluate the root queryset and register every recipe with the loaders.
+        # Recipes fetched with prefetch_related('recipeingredient_set__ingredient')
+        # are served from the prefetch cache without any further query.
+        recipes = list(recipes)
+        for recipe in recipes:
+            prefetched = getattr(recipe, '_prefetched_objects_cache', {})
+            if 'recipeingredient_set' in prefetched:
+                self.ingredients.prime(recipe.id, list(prefetched['recipeingredient_set']))
+        self.queue([recipe.id for recipe in recipes])
+        return recipes
+
+    def queue(self, recipe_ids):
+        self.ingredients.queue(recipe_ids)
+
+
+class AsyncRecipeLoaders(RecipeLoaders):
+    # Same interface for the async view: load() returns an awaitable and
+    # strawberry's DataLoader batches every key requested in one loop tick.
+    def __init__(self):
+        self.ingredients = DataLoader(load_fn=aload_recipe_ingredients)
+
+    def queue(self, recipe_ids):
+        pass
+
+
+@dataclass
+class RecipeManagerContext(StrawberryDjangoContext):
+    loaders: RecipeLoaders = field(default_factory=RecipeLoaders)
+
+
+def get_loaders(info):
+    context = info.context
+    if isinstance(context, dict):
+        return context.setdefault('loaders', AsyncRecipeLoaders() if in_event_loop() else RecipeLoaders())
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = AsyncRecipeLoaders() if in_event_loop() else RecipeLoaders()
+        context.loaders = loaders
+    return loaders
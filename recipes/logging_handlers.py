@@ -0,0 +1,83 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueuedFileHandler(QueueHandler):
+    """FileHandler whose formatting and disk writes happen on a listener thread.
+
+    The request thread only puts the record on a bounded queue; when the queue
+    is full the record is dropped rather than blocking the request. Configured
+    from settings.LOGGING like any handler (``filename``, ``formatter``).
+    """
+
+    def __init__(self, filename, max_queue_size=10000, encoding=None):
+        super().__init__(queue.Queue(maxsize=max_queue_size))
+        self.target = logging.FileHandler(filename, encoding=encoding, delay=True)
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # Formatting belongs to the listener thread, not to the caller
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # The stock prepare() formats the message so records survive pickling;
+        # this queue never leaves the process, so the record goes as-is.
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        # Started lazily (and again after a fork) so pre-forking servers get a
+        # listener thread in every worker.
+        if self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener_pid != os.getpid():
+                self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                self._listener.start()
+                self._listener_pid = os.getpid()
+                atexit.register(self.flush_queue)
+
+    def flush_queue(self):
+        # Drain pending records and stop the thread (at exit, or from tests)
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+        self.target.flush()
+
+    def close(self):
+        self.flush_queue()
+        self.target.close()
+        super().close()
+
+
+class JsonLineFormatter(logging.Formatter):
+    # One JSON object per line: timestamp, level, logger, message plus the
+    # ``fields`` dict passed through ``extra``. Byte values (response bodies)
+    # are decoded here, off the request thread.
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in getattr(record, 'fields', {}).items():
+            entry[key] = value.decode('utf-8', 'replace') if isinstance(value, bytes) else value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
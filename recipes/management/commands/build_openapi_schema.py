@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.openapi import build, code_version
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI document (JSON and YAML) for the current code version into OPENAPI_SCHEMA_DIR.'
+
+    def handle(self, *args, **options):
+        for path in build():
+            self.stdout.write(str(path))
+        self.stdout.write(self.style.SUCCESS(f'OpenAPI schema built for code version {code_version()}.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.services import BULK_CHUNK_SIZE, ingredient_count_mismatches, repair_ingredient_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare every Recipe.ingredient_count with its RecipeIngredient rows. Exits with an error when a count is '
+        'wrong, unless --repair recounts them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Recount the recipes found wrong.')
+        parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE * 20, help='Recipes checked per query.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        wrong = []
+        for recipe_id, stored, actual in ingredient_count_mismatches(options['database'], options['chunk_size']):
+            self.stdout.write(f'Recipe {recipe_id}: ingredient_count is {stored}, has {actual} ingredients')
+            wrong.append(recipe_id)
+        if not wrong:
+            self.stdout.write(self.style.SUCCESS('All ingredient counts are correct.'))
+        elif options['repair']:
+            for start in range(0, len(wrong), BULK_CHUNK_SIZE):
+                repair_ingredient_counts(wrong[start:start + BULK_CHUNK_SIZE], options['database'])
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(wrong)} ingredient count(s).'))
+        else:
+            raise CommandError(f'{len(wrong)} ingredient count(s) are wrong; run with --repair to fix them.')
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.export import CHUNK_SIZE, FORMATS, export_chunks
+
+
+class Command(BaseCommand):
+    help = 'Stream every recipe with its ingredients as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write; standard output when omitted.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Recipes read per query.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to export from.')
+
+    def handle(self, *args, **options):
+        chunks = export_chunks(options['format'], options['chunk_size'], options['database'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                size = self.write(chunks, output)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {size} bytes to {options['output']}."))
+        else:
+            # Binary stdout when run from a shell; call_command passes a text stream
+            output = getattr(options.get('stdout') or sys.stdout, 'buffer', None)
+            if output is None:
+                for chunk in chunks:
+                    self.stdout.write(chunk.decode(), ending='')
+            else:
+                self.write(chunks, output)
+                output.flush()
+
+    def write(self, chunks, output):
+        size = 0
+        for chunk in chunks:
+            output.write(chunk)
+            size += len(chunk)
+        return size
@@ -0,0 +1,132 @@
+import random
+import time
+from bisect import bisect
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.response_cache import RECIPE_LIST, invalidate
+
+FOODS = [
+    'Tomato', 'Onion', 'Garlic', 'Potato', 'Carrot', 'Celery', 'Pepper', 'Chili', 'Basil', 'Oregano', 'Thyme',
+    'Rosemary', 'Parsley', 'Cilantro', 'Ginger', 'Lemon', 'Lime', 'Orange', 'Apple', 'Banana', 'Berry', 'Mushroom',
+    'Spinach', 'Kale', 'Cabbage', 'Broccoli', 'Zucchini', 'Eggplant', 'Pumpkin', 'Corn', 'Pea', 'Bean', 'Lentil',
+    'Chickpea', 'Rice', 'Pasta', 'Noodle', 'Flour', 'Sugar', 'Salt', 'Butter', 'Cream', 'Milk', 'Yogurt', 'Cheese',
+    'Egg', 'Chicken', 'Beef', 'Pork', 'Lamb', 'Salmon', 'Tuna', 'Shrimp', 'Tofu', 'Almond', 'Walnut', 'Honey',
+    'Vinegar', 'Olive Oil', 'Soy Sauce', 'Mustard', 'Cumin', 'Paprika', 'Cinnamon', 'Vanilla', 'Cocoa', 'Coconut',
+]
+QUALIFIERS = ['', 'Fresh', 'Dried', 'Smoked', 'Ground', 'Organic', 'Frozen', 'Roasted', 'Pickled', 'Wild', 'Baby', 'Red']
+UNITS = ['g', 'kg', 'ml', 'l', 'tsp', 'tbsp', 'cup', 'piece', 'pinch']
+STYLES = ['Spicy', 'Creamy', 'Classic', 'Rustic', 'Quick', 'Slow-cooked', 'Grilled', 'Baked', 'Crispy', 'Summer', 'Winter']
+DISHES = ['Soup', 'Stew', 'Salad', 'Curry', 'Pie', 'Risotto', 'Tart', 'Stir-fry', 'Bowl', 'Casserole', 'Sandwich', 'Cake']
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset: users, ingredients with skewed popularity and recipes of varied size. '
+        'The same --seed always produces the same rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--min-ingredients', type=int, default=1, help='Fewest ingredients per recipe.')
+        parser.add_argument('--max-ingredients', type=int, default=25, help='Most ingredients per recipe.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of ingredient popularity.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Recipes written per transaction.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Need at least one user.')
+        if not 1 <= options['min_ingredients'] <= options['max_ingredients'] <= options['ingredients']:
+            raise CommandError('Need 1 <= --min-ingredients <= --max-ingredients <= --ingredients.')
+        self.using = options['database']
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        users = self.create_users(options['users'], options['seed'])
+        ingredient_ids = self.create_ingredients(rng, options['ingredients'], options['chunk_size'])
+        # Zipf-like popularity: the k-th most common ingredient is used ~1/k**skew as often
+        popular = ingredient_ids[:]
+        rng.shuffle(popular)
+        cum_weights = list(accumulate(1 / (rank ** options['skew']) for rank in range(1, len(popular) + 1)))
+
+        written = links = 0
+        while written < options['recipes']:
+            size = min(options['chunk_size'], options['recipes'] - written)
+            links += self.create_recipe_chunk(rng, size, users, popular, cum_weights, options)
+            written += size
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{written} recipes, {links} recipe ingredients ({written / elapsed:.0f} recipes/s)')
+
+        invalidate([RECIPE_LIST])
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users, {len(ingredient_ids)} ingredients, {written} recipes and '
+            f'{links} recipe ingredients in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def create_users(self, count, seed):
+        User = get_user_model()
+        usernames = [f'generated_{seed}_{i}' for i in range(count)]
+        password = make_password(None)  # unusable, hashed once
+        User.objects.using(self.using).bulk_create(
+            [User(username=username, password=password) for username in usernames],
+            batch_size=1000, ignore_conflicts=True,
+        )
+        return list(User.objects.using(self.using).filter(username__in=usernames).order_by('id').values_list('id', flat=True))
+
+    def create_ingredients(self, rng, count, chunk_size):
+        ids = []
+        for start in range(0, count, chunk_size):
+            batch = []
+            for i in range(start, min(start + chunk_size, count)):
+                qualifier = QUALIFIERS[i // len(FOODS) % len(QUALIFIERS)]
+                name = f'{qualifier} {FOODS[i % len(FOODS)]}'.strip()
+                if i >= len(FOODS) * len(QUALIFIERS):
+                    name = f'{name} {i // (len(FOODS) * len(QUALIFIERS)) + 1}'
+                batch.append(Ingredient(name=name, unit=rng.choice(UNITS)))
+            with transaction.atomic(using=self.using):
+                ids.extend(obj.id for obj in Ingredient.objects.using(self.using).bulk_create(batch))
+        return ids
+
+    def recipe_size(self, rng, options):
+        # Most recipes have a handful of ingredients, a long tail has many
+        low, high = options['min_ingredients'], options['max_ingredients']
+        return min(high, max(low, round(rng.lognormvariate(2.0, 0.45))))
+
+    def pick_ingredients(self, rng, size, popular, cum_weights):
+        chosen = {}
+        total = cum_weights[-1]
+        while len(chosen) < size:
+            chosen.setdefault(popular[bisect(cum_weights, rng.random() * total)], None)
+        return chosen
+
+    def create_recipe_chunk(self, rng, size, users, popular, cum_weights, options):
+        recipes, contents = [], []
+        for _ in range(size):
+            dish = f'{rng.choice(STYLES)} {rng.choice(FOODS)} {rng.choice(DISHES)}'
+            recipes.append(Recipe(
+                name=dish,
+                description=f'A {dish.lower()} for {rng.randint(1, 8)} people, ready in {rng.randrange(10, 180, 5)} minutes.',
+                created_by_id=rng.choice(users),
+            ))
+            ingredients = self.pick_ingredients(rng, self.recipe_size(rng, options), popular, cum_weights)
+            contents.append([(ingredient_id, Decimal(rng.randint(1, 2000)) / 4) for ingredient_id in ingredients])
+
+        with transaction.atomic(using=self.using):
+            Recipe.objects.using(self.using).bulk_create(recipes)
+            rows = [
+                RecipeIngredient(recipe_id=recipe.id, ingredient_id=ingredient_id, quantity=quantity)
+                for recipe, items in zip(recipes, contents)
+                for ingredient_id, quantity in items
+            ]
+            RecipeIngredient.objects.using(self.using).bulk_create(rows, batch_size=options['chunk_size'])
+        return len(rows)
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.importer import CHUNK_SIZE, READERS, RecipeImporter, RecordError
+from recipes.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Import recipes from an NDJSON or CSV file as written by export_recipes. With --job, progress is '
+        'checkpointed per chunk and running the same job again resumes after the last committed chunk.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read; '-' for standard input.")
+        parser.add_argument('--format', choices=list(READERS), help='Defaults to the file extension.')
+        parser.add_argument('--user', help='Username for records whose created_by is missing or unknown.')
+        parser.add_argument('--job', help='Checkpoint name; rerun with the same name to resume.')
+        parser.add_argument('--restart', action='store_true', help="Discard the job's checkpoint and start over.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Recipes written per transaction.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        path, using = options['path'], options['database']
+        format = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if format not in READERS:
+            raise CommandError(f"Cannot tell the format of '{path}'; pass --format ({', '.join(READERS)}).")
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.using(using).get(username=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown user '{options['user']}'.")
+        if options['restart'] and options['job']:
+            ImportCheckpoint.objects.using(using).filter(name=options['job']).delete()
+
+        importer = RecipeImporter(
+            default_user=user, job=options['job'], chunk_size=options['chunk_size'], using=using,
+            progress=self.report,
+        )
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        try:
+            stats = importer.run(stream, format)
+        except RecordError as error:
+            raise CommandError(str(error))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in stats.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats.recipes} recipes and {stats.recipe_ingredients} recipe ingredients '
+            f'({stats.ingredients_created} new ingredients) in {stats.elapsed:.1f}s, '
+            f'{stats.rows_per_second:.0f} rows/s; {stats.skipped} records skipped (resumed), {stats.failed} failed.'
+        ))
+
+    def report(self, stats):
+        self.stderr.write(
+            f'{stats.skipped + stats.records} records, {stats.recipes} recipes, '
+            f'{stats.recipe_ingredients} recipe ingredients ({stats.rows_per_second:.0f} rows/s)'
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.documents import REBUILD_CHUNK_SIZE, rebuild_documents
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the stale pre-rendered recipe documents (or, with --all, every one) ahead of the reads that '
+        'would otherwise build them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Render current documents again as well.')
+        parser.add_argument('--chunk-size', type=int, default=REBUILD_CHUNK_SIZE, help='Recipes rendered per query.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        built = rebuild_documents(options['database'], options['chunk_size'], everything=options['all'])
+        self.stdout.write(self.style.SUCCESS(f'Built {built} recipe document(s).'))
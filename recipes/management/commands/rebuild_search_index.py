@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the ingredient and recipe search index from the base tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild.')
+
+    def handle(self, *args, **options):
+        rebuild_search_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
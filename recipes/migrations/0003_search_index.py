@@ -0,0 +1,115 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# SQLite: external-content FTS5 tables kept in sync with the base tables by
+# triggers, so bulk_create/update()/raw SQL writes are indexed as well.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE recipes_ingredient_fts USING fts5(
+        name, content='recipes_ingredient', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER recipes_ingredient_fts_ai AFTER INSERT ON recipes_ingredient BEGIN
+        INSERT INTO recipes_ingredient_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_ingredient_fts_ad AFTER DELETE ON recipes_ingredient BEGIN
+        INSERT INTO recipes_ingredient_fts(recipes_ingredient_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_ingredient_fts_au AFTER UPDATE OF name ON recipes_ingredient BEGIN
+        INSERT INTO recipes_ingredient_fts(recipes_ingredient_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO recipes_ingredient_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5(
+        name, description, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    # Name matches outrank description matches
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER recipes_recipe_fts_ai AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_fts_ad AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_fts_au AFTER UPDATE OF name, description ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO recipes_recipe_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO recipes_ingredient_fts(recipes_ingredient_fts) VALUES ('rebuild')",
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_ingredient_fts_ai',
+    'DROP TRIGGER IF EXISTS recipes_ingredient_fts_ad',
+    'DROP TRIGGER IF EXISTS recipes_ingredient_fts_au',
+    'DROP TABLE IF EXISTS recipes_ingredient_fts',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_ai',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_ad',
+    'DROP TRIGGER IF EXISTS recipes_recipe_fts_au',
+    'DROP TABLE IF EXISTS recipes_recipe_fts',
+]
+
+
+def postgres_indexes():
+    # PostgreSQL keeps expression indexes current on every write, no triggers needed.
+    return [
+        ('Ingredient', GinIndex(OpClass('name', name='gin_trgm_ops'), name='ingredient_name_trgm_idx')),
+        ('Recipe', GinIndex(OpClass('name', name='gin_trgm_ops'), name='recipe_name_trgm_idx')),
+        ('Recipe', GinIndex(
+            SearchVector('name', weight='A', config='english')
+            + SearchVector('description', weight='B', config='english'),
+            name='recipe_search_vector_idx',
+        )),
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        for model_name, index in postgres_indexes():
+            schema_editor.add_index(apps.get_model('recipes', model_name), index)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        for model_name, index in postgres_indexes():
+            schema_editor.remove_index(apps.get_model('recipes', model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
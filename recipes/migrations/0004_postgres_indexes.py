@@ -0,0 +1,43 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# Ingredient search filters with icontains, which PostgreSQL runs as
+# UPPER(name::text) LIKE UPPER('%term%'). Only a trigram index on that same
+# expression can serve it, so it replaces the plain-name trigram index from
+# 0003, which no query used. Other backends are left alone.
+
+
+def old_index():
+    return GinIndex(OpClass('name', name='gin_trgm_ops'), name='ingredient_name_trgm_idx')
+
+
+def new_index():
+    return GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='ingredient_name_upper_trgm_idx')
+
+
+def swap_indexes(apps, schema_editor, add, remove):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    schema_editor.remove_index(Ingredient, remove)
+    schema_editor.add_index(Ingredient, add)
+
+
+def forwards(apps, schema_editor):
+    swap_indexes(apps, schema_editor, add=new_index(), remove=old_index())
+
+
+def backwards(apps, schema_editor):
+    swap_indexes(apps, schema_editor, add=old_index(), remove=new_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
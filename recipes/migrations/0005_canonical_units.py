@@ -0,0 +1,52 @@
+# Generated by Django 5.0.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+# Frozen copy of the codes and aliases in recipes/units.py as of this
+# migration, so later changes there don't change what it does
+UNIT_ALIASES = {
+    'mg': ('milligram', 'milligrams'),
+    'g': ('gr', 'gram', 'grams', 'gramme', 'grammes'),
+    'kg': ('kilo', 'kilos', 'kilogram', 'kilograms'),
+    'oz': ('ounce', 'ounces'),
+    'lb': ('lbs', 'pound', 'pounds'),
+    'ml': ('millilitre', 'millilitres', 'milliliter', 'milliliters'),
+    'l': ('litre', 'litres', 'liter', 'liters'),
+    'tsp': ('teaspoon', 'teaspoons'),
+    'tbsp': ('tablespoon', 'tablespoons'),
+    'fl_oz': ('fl oz', 'fluid ounce', 'fluid ounces'),
+    'cup': ('cups',),
+    'pinch': ('pinches',),
+    'piece': ('pieces', 'pc', 'pcs', 'each', 'unit', 'units'),
+    'dozen': ('doz',),
+}
+DEFAULT_UNIT = 'piece'
+
+LOOKUP = {alias: code for code, aliases in UNIT_ALIASES.items() for alias in (code, *aliases)}
+
+
+def map_units(apps, schema_editor):
+    # One UPDATE per distinct free-text value; anything unrecognisable
+    # (e.g. a bare number) becomes DEFAULT_UNIT. The original text isn't
+    # kept, so this can't be reversed.
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    for value in Ingredient.objects.values_list('unit', flat=True).distinct():
+        unit = LOOKUP.get(' '.join(str(value).lower().replace('.', ' ').split()), DEFAULT_UNIT)
+        if unit != value:
+            Ingredient.objects.filter(unit=value).update(unit=unit)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_postgres_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(map_units),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='unit',
+            field=models.CharField(choices=[('mg', 'mg'), ('g', 'g'), ('kg', 'kg'), ('oz', 'oz'), ('lb', 'lb'), ('ml', 'ml'), ('l', 'l'), ('tsp', 'tsp'), ('tbsp', 'tbsp'), ('fl_oz', 'fl_oz'), ('cup', 'cup'), ('pinch', 'pinch'), ('piece', 'piece'), ('dozen', 'dozen')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 5.0.2 on 2026-10-18 18:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Recipe.ingredient_count follows every insert and delete on
+# recipes_recipeingredient, whichever code path (ORM, bulk_create, raw SQL,
+# cascades) makes it.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_ai AFTER INSERT ON recipes_recipeingredient BEGIN
+        UPDATE recipes_recipe SET ingredient_count = ingredient_count + 1 WHERE id = new.recipe_id;
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_ad AFTER DELETE ON recipes_recipeingredient BEGIN
+        UPDATE recipes_recipe SET ingredient_count = ingredient_count - 1 WHERE id = old.recipe_id;
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_au AFTER UPDATE OF recipe_id ON recipes_recipeingredient
+    WHEN old.recipe_id != new.recipe_id BEGIN
+        UPDATE recipes_recipe SET ingredient_count = ingredient_count - 1 WHERE id = old.recipe_id;
+        UPDATE recipes_recipe SET ingredient_count = ingredient_count + 1 WHERE id = new.recipe_id;
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_ai',
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_ad',
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_au',
+]
+
+# Statement-level with transition tables: a bulk insert of N rows costs one
+# UPDATE per statement instead of N
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION recipes_recipe_ingredient_count() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE recipes_recipe AS recipe SET ingredient_count = recipe.ingredient_count + delta.n
+            FROM (SELECT recipe_id, count(*) AS n FROM new_rows GROUP BY recipe_id) AS delta
+            WHERE recipe.id = delta.recipe_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE recipes_recipe AS recipe SET ingredient_count = recipe.ingredient_count - delta.n
+            FROM (SELECT recipe_id, count(*) AS n FROM old_rows GROUP BY recipe_id) AS delta
+            WHERE recipe.id = delta.recipe_id;
+        ELSE
+            UPDATE recipes_recipe AS recipe SET ingredient_count = recipe.ingredient_count + delta.n
+            FROM (
+                SELECT recipe_id, sum(n) AS n FROM (
+                    SELECT recipe_id, 1 AS n FROM new_rows
+                    UNION ALL
+                    SELECT recipe_id, -1 AS n FROM old_rows
+                ) AS moved
+                GROUP BY recipe_id HAVING sum(n) <> 0
+            ) AS delta
+            WHERE recipe.id = delta.recipe_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_ai AFTER INSERT ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipe_ingredient_count()
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_ad AFTER DELETE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipe_ingredient_count()
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_ingredient_count_au AFTER UPDATE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipe_ingredient_count()
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_ai ON recipes_recipeingredient',
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_ad ON recipes_recipeingredient',
+    'DROP TRIGGER IF EXISTS recipes_recipe_ingredient_count_au ON recipes_recipeingredient',
+    'DROP FUNCTION IF EXISTS recipes_recipe_ingredient_count()',
+]
+
+
+def ingredient_count_field():
+    field = models.PositiveIntegerField(default=0, editable=False)
+    field.set_attributes_from_name('ingredient_count')
+    return field
+
+
+def add_column(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        # add_field() would rebuild recipes_recipe, which drops the FTS triggers from 0003
+        schema_editor.execute(
+            'ALTER TABLE recipes_recipe ADD COLUMN ingredient_count integer unsigned NOT NULL DEFAULT 0 '
+            'CHECK (ingredient_count >= 0)'
+        )
+    else:
+        schema_editor.add_field(apps.get_model('recipes', 'Recipe'), ingredient_count_field())
+
+
+def drop_column(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('ALTER TABLE recipes_recipe DROP COLUMN ingredient_count')
+    else:
+        schema_editor.remove_field(apps.get_model('recipes', 'Recipe'), ingredient_count_field())
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+    # Counts for the rows that existed before the triggers
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    alias = schema_editor.connection.alias
+    counts = (
+        RecipeIngredient.objects.using(alias).filter(recipe=OuterRef('pk'))
+        .order_by().values('recipe').annotate(n=Count('id')).values('n')
+    )
+    Recipe.objects.using(alias).update(ingredient_count=Coalesce(Subquery(counts), 0))
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(add_column, drop_column)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='recipe',
+                    name='ingredient_count',
+                    field=models.PositiveIntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['ingredient_count', 'id'], name='recipe_ingredient_count_idx'),
+        ),
+    ]
@@ -0,0 +1,143 @@
+# Generated by Django 5.0.2 on 2026-10-18 19:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A recipe's document goes stale (generation + 1) when the recipe row changes,
+# when one of its RecipeIngredient rows is updated, or when one of its
+# ingredients is. Inserting or deleting a RecipeIngredient updates the recipe's
+# ingredient_count (0007), which counts as a change of the recipe row; deleting
+# an Ingredient cascades to its RecipeIngredient rows the same way.
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_ai AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO recipes_recipedocument (recipe_id, generation, built_generation) VALUES (new.id, 1, 0);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_au AFTER UPDATE ON recipes_recipe BEGIN
+        UPDATE recipes_recipedocument SET generation = generation + 1 WHERE recipe_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_ad AFTER DELETE ON recipes_recipe BEGIN
+        DELETE FROM recipes_recipedocument WHERE recipe_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipeingredient_au AFTER UPDATE ON recipes_recipeingredient BEGIN
+        UPDATE recipes_recipedocument SET generation = generation + 1 WHERE recipe_id IN (old.recipe_id, new.recipe_id);
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_ingredient_au AFTER UPDATE ON recipes_ingredient BEGIN
+        UPDATE recipes_recipedocument SET generation = generation + 1
+        WHERE recipe_id IN (SELECT recipe_id FROM recipes_recipeingredient WHERE ingredient_id = new.id);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_ai',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_au',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_ad',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipeingredient_au',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_ingredient_au',
+]
+
+# Statement-level, like the ingredient_count triggers: one UPDATE per statement
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION recipes_recipedocument_stale() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'recipes_recipe' THEN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO recipes_recipedocument (recipe_id, generation, built_generation)
+                SELECT id, 1, 0 FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                DELETE FROM recipes_recipedocument AS document USING old_rows WHERE document.recipe_id = old_rows.id;
+            ELSE
+                UPDATE recipes_recipedocument AS document SET generation = document.generation + 1
+                FROM new_rows WHERE document.recipe_id = new_rows.id;
+            END IF;
+        ELSIF TG_TABLE_NAME = 'recipes_recipeingredient' THEN
+            UPDATE recipes_recipedocument AS document SET generation = document.generation + 1
+            WHERE document.recipe_id IN (SELECT recipe_id FROM new_rows UNION SELECT recipe_id FROM old_rows);
+        ELSE
+            UPDATE recipes_recipedocument AS document SET generation = document.generation + 1
+            WHERE document.recipe_id IN (
+                SELECT recipe_id FROM recipes_recipeingredient WHERE ingredient_id IN (SELECT id FROM new_rows)
+            );
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_ai AFTER INSERT ON recipes_recipe
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipedocument_stale()
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_au AFTER UPDATE ON recipes_recipe
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipedocument_stale()
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipe_ad AFTER DELETE ON recipes_recipe
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipedocument_stale()
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_recipeingredient_au AFTER UPDATE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipedocument_stale()
+    """,
+    """
+    CREATE TRIGGER recipes_recipedocument_ingredient_au AFTER UPDATE ON recipes_ingredient
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipedocument_stale()
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_ai ON recipes_recipe',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_au ON recipes_recipe',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipe_ad ON recipes_recipe',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_recipeingredient_au ON recipes_recipeingredient',
+    'DROP TRIGGER IF EXISTS recipes_recipedocument_ingredient_au ON recipes_ingredient',
+    'DROP FUNCTION IF EXISTS recipes_recipedocument_stale()',
+]
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}.get(vendor, []):
+        schema_editor.execute(statement)
+    # One stale document per existing recipe; they are rendered on first read
+    # or by rebuild_recipe_documents
+    schema_editor.execute(
+        'INSERT INTO recipes_recipedocument (recipe_id, generation, built_generation) SELECT id, 1, 0 FROM recipes_recipe'
+    )
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}.get(vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_ingredient_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeDocument',
+            fields=[
+                ('recipe', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='document', serialize=False, to='recipes.recipe')),
+                ('generation', models.PositiveBigIntegerField(default=1)),
+                ('built_generation', models.PositiveBigIntegerField(default=0)),
+                ('body', models.TextField(null=True)),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
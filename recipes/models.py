@@ -1,9 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .units import UNIT_CHOICES
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=100)
-    unit = models.CharField(max_length=50)
+    unit = models.CharField(max_length=50, choices=UNIT_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -12,6 +13,9 @@ class Ingredient(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='ingredient_name_id_idx'),
+        ]
 
 class Recipe(models.Model):
     name = models.CharField(max_length=200)
@@ -20,16 +24,29 @@ class Recipe(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Number of RecipeIngredient rows, maintained by database triggers (migration 0007)
+    # on every insert/delete, so bulk, raw and cascading writes keep it right too
+    ingredient_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
-    @property
-    def ingredient_count(self):
-        return self.ingredients.count()
+    def save(self, *args, **kwargs):
+        # Never write back an ingredient_count read before the triggers last changed it
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name != 'ingredient_count'
+            ]
+        super().save(*args, **kwargs)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipe_created_at_id_idx'),
+            models.Index(fields=['ingredient_count', 'id'], name='recipe_ingredient_count_idx'),
+        ]
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
@@ -40,3 +57,30 @@ class RecipeIngredient(models.Model):
 
     class Meta:
         unique_together = ('recipe', 'ingredient')
+
+class ImportCheckpoint(models.Model):
+    """How far a named import_recipes job got: input records consumed, committed with each chunk."""
+    name = models.CharField(max_length=200, unique=True)
+    position = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.position})"
+
+class RecipeDocument(models.Model):
+    """A recipe pre-rendered as the JSON RecipeSerializer produces, served by the recipe list and detail views.
+
+    Triggers (migration 0008) add the row with each recipe and bump ``generation``
+    whenever the recipe, its RecipeIngredient rows or one of its ingredients change;
+    the body is current while ``built_generation`` equals ``generation``.
+    """
+    # Rows are created and deleted with their recipe by the triggers
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name='document',
+    )
+    generation = models.PositiveBigIntegerField(default=1)
+    built_generation = models.PositiveBigIntegerField(default=0)
+    body = models.TextField(null=True)
+
+    def __str__(self):
+        return f"Document for recipe {self.recipe_id}"
@@ -0,0 +1,140 @@
+"""
+Precomputed OpenAPI document for /swagger.json and /swagger.yaml.
+
+Introspecting every viewset and serializer takes a while, so the document is
+generated once per code version: by ``manage.py build_openapi_schema`` at
+build time, or on the first request. It is kept in memory and on disk
+(OPENAPI_SCHEMA_DIR) next to a gzipped copy, and served with a strong ETag.
+"""
+import gzip
+import hashlib
+import re
+import threading
+from pathlib import Path
+
+import django
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+FORMATS = {
+    '.json': ('application/json', OpenAPICodecJson),
+    '.yaml': ('application/yaml', OpenAPICodecYaml),
+}
+# Packages whose source decides what the document contains
+SOURCE_PACKAGES = ('recipes', 'recipe_manager')
+GZIP_RE = re.compile(r'\bgzip\b')
+
+_documents = {}
+_lock = threading.Lock()
+_code_version = None
+
+
+class SchemaDocument:
+    def __init__(self, body, media_type):
+        self.body = body
+        self.media_type = media_type
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+
+
+def code_version():
+    """OPENAPI_CODE_VERSION, or a digest of the app source and library versions."""
+    global _code_version
+    if settings.OPENAPI_CODE_VERSION:
+        return settings.OPENAPI_CODE_VERSION
+    if _code_version is None:
+        digest = hashlib.sha256(f'{django.__version__} {rest_framework.__version__} {drf_yasg.__version__}'.encode())
+        for package in SOURCE_PACKAGES:
+            root = Path(settings.BASE_DIR) / package
+            for path in sorted(root.rglob('*.py')):
+                digest.update(str(path.relative_to(root)).encode())
+                digest.update(path.read_bytes())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def document_path(version, format):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'swagger-{version}{format}'
+
+
+def generate(format):
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(import_string(settings.OPENAPI_INFO))
+    # No request: the document must not depend on who asked or the Host header
+    schema = generator.get_schema(request=None, public=True)
+    _, codec_class = FORMATS[format]
+    return codec_class(validators=[]).encode(schema)
+
+
+def get_document(format):
+    """The document for ``format`` ('.json' or '.yaml'), generated at most once per code version."""
+    version = code_version()
+    key = (version, format)
+    document = _documents.get(key)
+    if document is None:
+        with _lock:
+            document = _documents.get(key)
+            if document is None:
+                path = document_path(version, format)
+                try:
+                    body = path.read_bytes()
+                except OSError:
+                    body = generate(format)
+                    write_document(path, body)
+                document = SchemaDocument(body, FORMATS[format][0])
+                # Only the current version is worth keeping
+                for stale in [other for other in _documents if other[0] != version]:
+                    del _documents[stale]
+                _documents[key] = document
+    return document
+
+
+def write_document(path, body):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(path.suffix + '.tmp')
+        temporary.write_bytes(body)
+        temporary.replace(path)
+    except OSError:
+        pass  # read-only filesystem: memory only
+
+
+def build():
+    """Write every format for the current code version and delete older ones; returns the written paths."""
+    version = code_version()
+    paths = []
+    for format in FORMATS:
+        path = document_path(version, format)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(generate(format))
+        paths.append(path)
+        for old in path.parent.glob(f'swagger-*{format}'):
+            if old != path:
+                old.unlink()
+    return paths
+
+
+@require_safe
+def schema_document_view(request, format):
+    if format not in FORMATS:
+        raise Http404
+    document = get_document(format)
+    use_gzip = bool(GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    etag = document.gzip_etag if use_gzip else document.etag
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(document.gzipped if use_gzip else document.body, content_type=document.media_type)
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = str(len(response.content))
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
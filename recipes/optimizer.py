@@ -0,0 +1,91 @@
+from django.db.models import Prefetch
+from strawberry.types.nodes import SelectedField
+
+from . import models
+
+# GraphQL field name -> model field backing it. Fields missing from these maps
+# (ingredients, __typename, ...) are resolved separately.
+INGREDIENT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'unit': 'unit',
+    'createdAt': 'created_at',
+    'updatedAt': 'updated_at',
+}
+
+RECIPE_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'createdBy': 'created_by',
+    'createdAt': 'created_at',
+    'updatedAt': 'updated_at',
+    'ingredientCount': 'ingredient_count',
+}
+
+RECIPE_INGREDIENT_FIELDS = {
+    'id': 'id',
+    'quantity': 'quantity',
+}
+
+def collect_fields(selections):
+    # Flatten fragments into a single {name: [SelectedField, ...]} mapping.
+    fields = {}
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            fields.setdefault(selection.name, []).append(selection)
+        else:
+            for name, selected in collect_fields(selection.selections).items():
+                fields.setdefault(name, []).extend(selected)
+    return fields
+
+
+def child_fields(selected):
+    selections = []
+    for field in selected:
+        selections.extend(field.selections)
+    return collect_fields(selections)
+
+
+def root_fields(info):
+    return child_fields(info.selected_fields)
+
+
+def only_fields(fields, mapping, prefix=''):
+    return {prefix + mapping[name] for name in fields if name in mapping}
+
+
+def optimize_ingredients(queryset, fields, required=()):
+    return queryset.only(*only_fields(fields, INGREDIENT_FIELDS) | {'id', *required})
+
+
+def recipe_ingredient_queryset(fields):
+    queryset = models.RecipeIngredient.objects.all()
+    columns = {'recipe'} | only_fields(fields, RECIPE_INGREDIENT_FIELDS)
+    if 'ingredient' in fields:
+        columns.add('ingredient')
+        columns |= only_fields(child_fields(fields['ingredient']), INGREDIENT_FIELDS, 'ingredient__')
+        queryset = queryset.select_related('ingredient')
+    return queryset.only(*columns)
+
+
+def connection_fields(fields):
+    # edges { node { ... } } -> the node's own selections
+    edges = child_fields(fields.get('edges', []))
+    return child_fields(edges.get('node', []))
+
+
+def optimize_recipes(queryset, fields, required=()):
+    columns = only_fields(fields, RECIPE_FIELDS) | {'id', *required}
+    if 'createdBy' in fields:
+        queryset = queryset.select_related('created_by')
+    if 'ingredients' in fields:
+        nested = child_fields(fields['ingredients'])
+        # RecipeIngredientType.recipe is served from the parent instance the
+        # prefetch attaches, so its columns have to be loaded up front too.
+        if 'recipe' in nested:
+            columns |= only_fields(child_fields(nested['recipe']), RECIPE_FIELDS)
+        queryset = queryset.prefetch_related(
+            Prefetch('recipeingredient_set', queryset=recipe_ingredient_queryset(nested))
+        )
+    return queryset.only(*columns)
@@ -0,0 +1,183 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Ingredient, Recipe
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    def __init__(self, items, keyset, has_next, has_previous):
+        self.items = items
+        self.keyset = keyset
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def start_cursor(self):
+        return self.keyset.cursor(self.items[0]) if self.items else None
+
+    @property
+    def end_cursor(self):
+        return self.keyset.cursor(self.items[-1]) if self.items else None
+
+
+class Keyset:
+    # Seek pagination over a unique ordering: a page starts with a WHERE on the
+    # last row's ordering values instead of an OFFSET, so page 1000 reads the
+    # same number of index entries as page 1.
+    def __init__(self, model, ordering):
+        self.model = model
+        self.ordering = ordering
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def order_by(self, queryset, reverse=False):
+        return queryset.order_by(*[
+            ('-' if descending != reverse else '') + name for name, descending in self.fields
+        ])
+
+    def cursor(self, obj):
+        if isinstance(obj, dict):
+            # A values() row, as the list endpoints' values serializers page over
+            obj = self.model(**{name: obj[name] for name, _ in self.fields})
+        values = [self.model._meta.get_field(name).value_to_string(obj) for name, _ in self.fields]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode(self, cursor):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.fields):
+                raise ValueError(cursor)
+            return [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except Exception as e:
+            raise InvalidCursor('Invalid cursor') from e
+
+    def seek(self, values, reverse=False):
+        # (a, b) after (x, y)  ==>  a >= x AND (a > x OR (a = x AND b > y))
+        # The leading range keeps the condition usable as an index range scan.
+        conditions = []
+        for position, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {field: value for (field, _), value in zip(self.fields[:position], values)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': values[position]}))
+        first_name, first_descending = self.fields[0]
+        leading = Q(**{f"{first_name}__{'lte' if first_descending != reverse else 'gte'}": values[0]})
+        return leading & reduce(or_, conditions)
+
+    def page_queryset(self, queryset, size, after=None, before=None):
+        # One row past the page tells whether another page follows
+        reverse = before is not None and after is None
+        cursor = before if reverse else after
+        queryset = self.order_by(queryset, reverse)
+        if cursor:
+            queryset = queryset.filter(self.seek(self.decode(cursor), reverse))
+        return queryset[:size + 1], reverse, bool(cursor)
+
+    def build_page(self, items, size, reverse, has_cursor):
+        has_more = len(items) > size
+        items = items[:size]
+        if reverse:
+            items.reverse()
+            return KeysetPage(items, self, has_next=True, has_previous=has_more)
+        return KeysetPage(items, self, has_next=has_more, has_previous=has_cursor)
+
+    def page(self, queryset, size, after=None, before=None):
+        queryset, reverse, has_cursor = self.page_queryset(queryset, size, after, before)
+        return self.build_page(list(queryset), size, reverse, has_cursor)
+
+    async def apage(self, queryset, size, after=None, before=None):
+        queryset, reverse, has_cursor = self.page_queryset(queryset, size, after, before)
+        return self.build_page([obj async for obj in queryset], size, reverse, has_cursor)
+
+
+RECIPE_KEYSET = Keyset(Recipe, ('-created_at', '-id'))
+# ?ordering= values for the recipe list; each one is backed by an index
+RECIPE_KEYSETS = {
+    '-created_at': RECIPE_KEYSET,
+    'ingredient_count': Keyset(Recipe, ('ingredient_count', 'id')),
+    '-ingredient_count': Keyset(Recipe, ('-ingredient_count', '-id')),
+}
+INGREDIENT_KEYSET = Keyset(Ingredient, ('name', 'id'))
+
+
+def clamp_page_size(size, default=None):
+    if size is None or size <= 0:
+        return default or settings.RECIPES_DEFAULT_PAGE_SIZE
+    return min(size, settings.RECIPES_MAX_PAGE_SIZE)
+
+
+class KeysetCursorPagination(CursorPagination):
+    keyset = None
+    # {?ordering= value: Keyset} a client may choose from instead of the default keyset
+    keysets = {}
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+
+    @property
+    def page_size(self):
+        return settings.RECIPES_DEFAULT_PAGE_SIZE
+
+    @property
+    def max_page_size(self):
+        return settings.RECIPES_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+        encoded = request.query_params.get(self.cursor_query_param)
+        after = before = None
+        if encoded:
+            direction, _, cursor = encoded.partition('.')
+            if direction not in ('n', 'p'):
+                raise NotFound(self.invalid_cursor_message)
+            after, before = (cursor, None) if direction == 'n' else (None, cursor)
+        try:
+            self.keyset_page = self.get_keyset(request).page(queryset, self.get_page_size(request), after=after, before=before)
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return self.keyset_page.items
+
+    def get_page_size(self, request):
+        return clamp_page_size(super().get_page_size(request))
+
+    def get_keyset(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        if not ordering:
+            return self.keyset
+        if ordering not in self.keysets:
+            raise ValidationError({self.ordering_query_param: f"Use one of: {', '.join(self.keysets)}."})
+        return self.keysets[ordering]
+
+    def get_next_link(self):
+        if not self.keyset_page.has_next or not self.keyset_page.items:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, f'n.{self.keyset_page.end_cursor}')
+
+    def get_previous_link(self):
+        if not self.keyset_page.has_previous:
+            return None
+        if not self.keyset_page.items:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, f'p.{self.keyset_page.start_cursor}')
+
+
+class RecipeCursorPagination(KeysetCursorPagination):
+    keyset = RECIPE_KEYSET
+    keysets = RECIPE_KEYSETS
+
+
+class IngredientCursorPagination(KeysetCursorPagination):
+    keyset = INGREDIENT_KEYSET
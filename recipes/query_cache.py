@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.http import GraphQLRequestData
+from strawberry.schema.execute import parse_document, validate_document
+
+PERSISTED_QUERY_KEY = 'graphql:apq:{}'
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+class DocumentCacheEntry:
+    def __init__(self, query, document):
+        self.query = query
+        self.document = document
+        self.validation_errors = {}  # validation rules -> errors
+
+
+class DocumentCache:
+    # Process-wide LRU of parsed documents keyed by query hash. Shared by every
+    # request (schema extensions are instantiated per request), so it is locked.
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.GRAPHQL_DOCUMENT_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+document_cache = DocumentCache()
+
+
+class DocumentCacheExtension(SchemaExtension):
+    """Skip parsing and validation for documents this process has already seen.
+
+    Unlike strawberry's ParserCache/ValidationCache this keys on the sha256 of
+    the query text (the same key Automatic Persisted Queries use) rather than
+    hashing the whole AST for every validation lookup.
+    """
+
+    entry = None
+
+    def on_parse(self):
+        execution_context = self.execution_context
+        if execution_context.query and settings.GRAPHQL_DOCUMENT_CACHE_SIZE > 0:
+            key = query_hash(execution_context.query)
+            self.entry = document_cache.get(key)
+            if self.entry is None:
+                try:
+                    document = parse_document(execution_context.query, **execution_context.parse_options)
+                except GraphQLError:
+                    # Not cached; strawberry parses it again and reports the syntax error
+                    yield
+                    return
+                self.entry = document_cache.set(key, DocumentCacheEntry(execution_context.query, document))
+            execution_context.graphql_document = self.entry.document
+        yield
+
+    def on_validate(self):
+        execution_context = self.execution_context
+        if self.entry is not None and execution_context.errors is None:
+            rules = execution_context.validation_rules
+            errors = self.entry.validation_errors.get(rules)
+            if errors is None:
+                errors = validate_document(execution_context.schema._schema, self.entry.document, rules)
+                self.entry.validation_errors[rules] = errors
+            execution_context.errors = errors
+        yield
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message, code, status=200):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+    def as_response_data(self):
+        return {'errors': [{'message': str(self), 'extensions': {'code': self.code}}]}
+
+
+def persisted_query_store():
+    return caches[settings.GRAPHQL_PERSISTED_QUERY_CACHE]
+
+
+def resolve_persisted_query(query, extensions):
+    """Return the query text for a request, following the Automatic Persisted Queries protocol.
+
+    A request carrying ``extensions.persistedQuery.sha256Hash`` without a query
+    is answered from the document cache or the persisted query store; with a
+    query, the query is checked against the hash and stored for later requests.
+    """
+    if isinstance(extensions, str):
+        extensions = json.loads(extensions) if extensions else None
+    persisted = (extensions or {}).get('persistedQuery')
+    if not persisted or not settings.GRAPHQL_PERSISTED_QUERIES:
+        return query
+    if persisted.get('version') != 1:
+        raise PersistedQueryError('Unsupported persisted query version', 'PERSISTED_QUERY_VERSION_NOT_SUPPORTED', 400)
+    key = persisted.get('sha256Hash')
+
+    if query is None:
+        entry = document_cache.get(key)
+        if entry is not None:
+            return entry.query
+        query = persisted_query_store().get(PERSISTED_QUERY_KEY.format(key))
+        if query is None:
+            raise PersistedQueryError('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND')
+        return query
+
+    if query_hash(query) != key:
+        raise PersistedQueryError('provided sha does not match query', 'PERSISTED_QUERY_HASH_MISMATCH', 400)
+    persisted_query_store().set(PERSISTED_QUERY_KEY.format(key), query, settings.GRAPHQL_PERSISTED_QUERY_TIMEOUT)
+    return query
+
+
+def graphql_request_data(data):
+    return GraphQLRequestData(
+        query=resolve_persisted_query(data.get('query'), data.get('extensions')),
+        variables=data.get('variables'),
+        operation_name=data.get('operationName'),
+    )
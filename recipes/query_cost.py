@@ -0,0 +1,167 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    ListValueNode,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_leaf_type,
+    is_list_type,
+)
+from graphql.utilities import get_operation_ast
+from strawberry.extensions import SchemaExtension
+
+from .pagination import clamp_page_size
+
+PAGE_SIZE_ARGUMENTS = ('limit', 'first', 'last')
+
+
+class QueryCost:
+    """Estimated cost and depth of one operation, before it runs.
+
+    Every object-returning field costs 1 per item it produces, times the
+    number of items its parents produce. List sizes come from the limit/
+    first/last arguments (clamped the way the resolvers clamp them), from the
+    length of list inputs for batch mutations, and otherwise from
+    RECIPES_MAX_PAGE_SIZE for root lists and GRAPHQL_COST_LIST_SIZE for nested
+    ones such as RecipeType.ingredients.
+    """
+
+    def __init__(self, schema, document, operation_name=None, variables=None):
+        self.schema = schema
+        self.document = document
+        self.variables = variables or {}
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if definition.kind == 'fragment_definition'
+        }
+        self.operation = get_operation_ast(document, operation_name)
+        self.variable_defaults = {}
+        if self.operation is not None:
+            for definition in self.operation.variable_definitions or ():
+                self.variable_defaults[definition.variable.name.value] = definition.default_value
+
+    def measure(self):
+        # (cost, depth) of the operation; (0, 0) when there is nothing to run
+        if self.operation is None:
+            return 0, 0
+        root_type = self.schema.get_root_type(self.operation.operation)
+        if root_type is None:
+            return 0, 0
+        return self.selection_cost(root_type, self.operation.selection_set, root=True)
+
+    def selection_cost(self, parent_type, selection_set, root=False, expanding=frozenset()):
+        # ``expanding``: fragments being spread on the way here; validation has not run
+        # yet, so a fragment that spreads itself must not be followed again
+        cost = depth = 0
+        for field_node, field_type, spread in self.fields(parent_type, selection_set, expanding):
+            named_type = get_named_type(field_type)
+            if is_leaf_type(named_type):
+                continue
+            items = self.items(parent_type, field_node, field_type, root)
+            child_cost, child_depth = self.selection_cost(named_type, field_node.selection_set, expanding=spread)
+            cost += items * (1 + child_cost)
+            depth = max(depth, 1 + child_depth)
+        return cost, depth
+
+    def fields(self, parent_type, selection_set, expanding=frozenset()):
+        # (field node, field type, fragments spread to reach it)
+        for selection in selection_set.selections if selection_set else ():
+            if isinstance(selection, FieldNode):
+                # __typename and introspection fields are not in .fields and cost nothing
+                field = getattr(parent_type, 'fields', {}).get(selection.name.value)
+                if field is not None:
+                    yield selection, field.type, expanding
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                # A cycle is left to validation (NoFragmentCyclesRule) to report
+                if fragment is not None and name not in expanding:
+                    yield from self.fields(
+                        self.schema.get_type(fragment.type_condition.name.value), fragment.selection_set,
+                        expanding | {name},
+                    )
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                yield from self.fields(fragment_type, selection.selection_set, expanding)
+
+    def items(self, parent_type, field_node, field_type, root):
+        if is_connection(parent_type) and field_node.name.value == 'edges':
+            return 1  # already counted by the connection field's first/last
+        arguments = {argument.name.value: argument.value for argument in field_node.arguments}
+        size = next(
+            (self.value(arguments[name]) for name in PAGE_SIZE_ARGUMENTS if name in arguments), None
+        )
+        if is_connection(get_named_type(field_type)):
+            return clamp_page_size(size)
+        if not is_list_type(get_nullable_type(field_type)):
+            return 1
+        if size is not None:
+            return clamp_page_size(size, default=settings.RECIPES_MAX_PAGE_SIZE)
+        for value_node in arguments.values():
+            value = self.value(value_node)
+            if isinstance(value, list):
+                return max(len(value), 1)
+        return settings.RECIPES_MAX_PAGE_SIZE if root else settings.GRAPHQL_COST_LIST_SIZE
+
+    def value(self, node):
+        if isinstance(node, VariableNode):
+            name = node.name.value
+            if name in self.variables:
+                value = self.variables[name]
+                return value if isinstance(value, (int, list)) else None
+            node = self.variable_defaults.get(name)
+        if isinstance(node, IntValueNode):
+            return int(node.value)
+        if isinstance(node, ListValueNode):
+            return node.values
+        return None
+
+
+def is_connection(graphql_type):
+    fields = getattr(graphql_type, 'fields', None) or {}
+    return 'edges' in fields and 'pageInfo' in fields
+
+
+class QueryCostExtension(SchemaExtension):
+    """Reject operations whose QueryCost exceeds GRAPHQL_MAX_QUERY_COST or GRAPHQL_MAX_QUERY_DEPTH.
+
+    Runs before GraphQL validation, so a rejected operation never executes;
+    accepted operations report their cost under ``extensions.cost``.
+    """
+
+    cost = None
+
+    def on_validate(self):
+        execution_context = self.execution_context
+        if not execution_context.errors:
+            cost, depth = QueryCost(
+                execution_context.schema._schema,
+                execution_context.graphql_document,
+                execution_context.operation_name,
+                execution_context.variables,
+            ).measure()
+            self.cost = {
+                'requested': cost,
+                'budget': settings.GRAPHQL_MAX_QUERY_COST,
+                'depth': depth,
+                'maxDepth': settings.GRAPHQL_MAX_QUERY_DEPTH,
+            }
+            if cost > settings.GRAPHQL_MAX_QUERY_COST or depth > settings.GRAPHQL_MAX_QUERY_DEPTH:
+                error = GraphQLError(
+                    f'Query is too expensive: cost {cost} (budget {settings.GRAPHQL_MAX_QUERY_COST}), '
+                    f'depth {depth} (at most {settings.GRAPHQL_MAX_QUERY_DEPTH})',
+                    extensions={'code': 'QUERY_TOO_EXPENSIVE', 'cost': self.cost},
+                )
+                execution_context.errors = [*(execution_context.errors or ()), error]
+        yield
+
+    def get_results(self):
+        return {'cost': self.cost} if self.cost is not None else {}
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from graphql import ExecutionResult, FieldNode, IntValueNode, OperationType, VariableNode
+from graphql.utilities import get_operation_ast
+from rest_framework.response import Response
+from strawberry.extensions import SchemaExtension
+
+from .db_router import consistent_reads
+from .query_cache import query_hash
+
+# Cached responses are keyed by the versions of the data they were built from.
+# A write bumps the version of every tag it touches (one recipe, and the recipe
+# list), so stale entries are never looked up again and simply expire.
+RECIPE_LIST = 'recipe-list'
+VERSION_KEY = 'recipes:version:{}'
+RESPONSE_KEY = 'recipes:response:{}:{}'
+
+
+def recipe_tag(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def response_cache():
+    return caches[settings.RECIPES_RESPONSE_CACHE]
+
+
+def new_version():
+    return uuid.uuid4().hex, time.time()
+
+
+def get_versions(tags):
+    cache = response_cache()
+    keys = {tag: VERSION_KEY.format(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    for key in keys.values():
+        if key not in found:
+            # Never seen or evicted: a fresh token can't match anything cached before
+            cache.add(key, new_version(), None)
+            found[key] = cache.get(key) or new_version()
+    return {tag: found[key] for tag, key in keys.items()}
+
+
+def versions_digest(tags):
+    # (digest, last modified timestamp) of the current versions of ``tags``
+    versions = get_versions(tags)
+    digest = hashlib.sha1('|'.join(f'{tag}={versions[tag][0]}' for tag in sorted(versions)).encode()).hexdigest()
+    return digest, max(modified for _, modified in versions.values())
+
+
+def invalidate(tags):
+    tags = set(tags)
+    if not tags:
+        return
+
+    def bump():
+        response_cache().set_many({VERSION_KEY.format(tag): new_version() for tag in tags}, None)
+
+    bump()
+    # Bumped again once the transaction commits, so a reader that cached the
+    # old rows in between does not keep them
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def invalidate_recipes(recipe_ids):
+    invalidate([RECIPE_LIST, *(recipe_tag(recipe_id) for recipe_id in recipe_ids)])
+
+
+def cached_response(request, tags, render):
+    """Serve a DRF read from the response cache, with ETag/Last-Modified and 304s.
+
+    ``render()`` runs the view (queries and serializers) only on a miss; its
+    ``response.data`` is cached when the status is 200.
+    """
+    if settings.RECIPES_RESPONSE_CACHE_TIMEOUT <= 0:
+        return render()
+    digest, last_modified = versions_digest(tags)
+    etag = f'W/"{digest}"'
+    last_modified = int(last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = RESPONSE_KEY.format(digest, hashlib.sha1(request.build_absolute_uri().encode()).hexdigest())
+        data = response_cache().get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            with consistent_reads():
+                response = render()
+            if response.status_code != 200:
+                return response
+            response_cache().set(key, response.data, settings.RECIPES_RESPONSE_CACHE_TIMEOUT)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def graphql_tags(execution_context):
+    # Tags a query operation depends on, or None when it reads anything besides
+    # Query.recipe / Query.recipes / Query.recipesConnection
+    operation = get_operation_ast(execution_context.graphql_document, execution_context.operation_name)
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+    variables = execution_context.variables or {}
+    tags = set()
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return None
+        name = selection.name.value
+        if name == '__typename':
+            continue
+        if name in ('recipes', 'recipesConnection'):
+            tags.add(RECIPE_LIST)
+        elif name == 'recipe':
+            value = next((argument.value for argument in selection.arguments if argument.name.value == 'id'), None)
+            if isinstance(value, VariableNode):
+                recipe_id = variables.get(value.name.value)
+            else:
+                recipe_id = int(value.value) if isinstance(value, IntValueNode) else None
+            if not isinstance(recipe_id, int):
+                return None
+            tags.add(recipe_tag(recipe_id))
+        else:
+            return None
+    return tags or None
+
+
+class ResponseCacheExtension(SchemaExtension):
+    # Serves recipe reads from the response cache by handing strawberry a
+    # ready-made result, which makes it skip execution.
+    def on_execute(self):
+        execution_context = self.execution_context
+        tags = graphql_tags(execution_context) if settings.RECIPES_RESPONSE_CACHE_TIMEOUT > 0 else None
+        if tags is None:
+            yield
+            return
+
+        digest, _ = versions_digest(tags)
+        request_key = json.dumps(
+            [query_hash(execution_context.query), execution_context.operation_name, execution_context.variables],
+            sort_keys=True, default=str,
+        )
+        key = RESPONSE_KEY.format(digest, hashlib.sha1(request_key.encode()).hexdigest())
+        data = response_cache().get(key)
+        if data is not None:
+            execution_context.result = ExecutionResult(data=data)
+            yield
+            return
+        with consistent_reads():
+            yield
+        result = execution_context.result
+        if result is not None and not result.errors:
+            response_cache().set(key, result.data, settings.RECIPES_RESPONSE_CACHE_TIMEOUT)
@@ -1,53 +1,177 @@
 import strawberry
 from typing import List, Optional
-from . import models
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from . import models, services
+from .async_support import alist, get_first, in_event_loop, then, thread_when_async
 from .types import (
     IngredientType, RecipeType, RecipeIngredientType,
-    IngredientInput, RecipeInput, RecipeIngredientInput, UpdateRecipeInput
+    IngredientInput, RecipeInput, RecipeIngredientInput, UpdateRecipeInput,
+    PageInfo, IngredientEdge, IngredientConnection, RecipeEdge, RecipeConnection,
+    RecipeBatchResult, RecipeIngredientBatchResult,
+    ShoppingListItemType, ShoppingListUnitType, ShoppingListRecipeInput, ScaledIngredientType
 )
 from .serializers import IngredientSerializer, RecipeSerializer
+from .loaders import get_loaders
+from .optimizer import connection_fields, optimize_ingredients, optimize_recipes, root_fields
+from .pagination import INGREDIENT_KEYSET, RECIPE_KEYSET, RECIPE_KEYSETS, clamp_page_size
+from .search import filter_search, ranked_search
+from .shopping_list import shopping_list, to_multipliers
+from .units import scaled_recipe_ingredients
+from .query_cache import DocumentCacheExtension
+from .query_cost import QueryCostExtension
+from .response_cache import ResponseCacheExtension
+from .db_router import ReadOnlyQueryExtension
+
+
+def paginate_connection(keyset, queryset, edge_type, connection_type, first, after, last, before, prepare=None):
+    size = clamp_page_size(last if before is not None and after is None else first)
+
+    def build(page):
+        if prepare is not None:
+            prepare(page.items)
+        return connection_type(
+            edges=[edge_type(cursor=keyset.cursor(item), node=item) for item in page.items],
+            page_info=PageInfo(
+                has_next_page=page.has_next,
+                has_previous_page=page.has_previous,
+                start_cursor=page.start_cursor,
+                end_cursor=page.end_cursor,
+            ),
+        )
+
+    paginate = keyset.apage if in_event_loop() else keyset.page
+    return then(paginate(queryset, size, after=after, before=before), build)
+
+def fetch_window(queryset, name, limit, offset):
+    # Best matches first when searching, otherwise the plain OFFSET window
+    if in_event_loop():
+        return afetch_window(queryset, name, limit, offset)
+    if name:
+        return list(ranked_search(queryset, name, limit, offset))
+    return list(queryset[offset:offset + limit])
+
+async def afetch_window(queryset, name, limit, offset):
+    if name:
+        queryset = await sync_to_async(ranked_search)(queryset, name, limit, offset)
+    else:
+        queryset = queryset[offset:offset + limit]
+    return await alist(queryset)
+
+def ingredient_quantities(input):
+    # Plain ingredient ids carry no quantity (services.DEFAULT_QUANTITY for new
+    # rows, unchanged for existing ones); ingredientQuantities win over them.
+    if input.ingredients is None and input.ingredient_quantities is None:
+        return None
+    quantities = dict.fromkeys(input.ingredients or [])
+    quantities.update((item.ingredient_id, item.quantity) for item in input.ingredient_quantities or [])
+    return quantities
+
+def filter_ingredient_count(queryset, min_ingredients, max_ingredients):
+    if min_ingredients is not None:
+        queryset = queryset.filter(ingredient_count__gte=min_ingredients)
+    if max_ingredients is not None:
+        queryset = queryset.filter(ingredient_count__lte=max_ingredients)
+    return queryset
+
+def check_batch_size(items):
+    if len(items) > settings.RECIPES_MAX_BATCH_SIZE:
+        raise ValueError(f'Batch too large: {len(items)} items, at most {settings.RECIPES_MAX_BATCH_SIZE} allowed')
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def ingredients(self, name: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None) -> List[IngredientType]:
-        queryset = models.Ingredient.objects.all()
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        if offset is not None:
-            queryset = queryset[offset:]
-        if limit is not None:
-            queryset = queryset[:limit]
-        return queryset
+    def ingredients(self, info, name: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None) -> List[IngredientType]:
+        queryset = optimize_ingredients(models.Ingredient.objects.all(), root_fields(info))
+        limit = clamp_page_size(limit, default=settings.RECIPES_MAX_PAGE_SIZE)
+        return fetch_window(queryset, name, limit, offset or 0)
 
     @strawberry.field
-    def ingredient(self, id: int) -> Optional[IngredientType]:
-        return models.Ingredient.objects.filter(id=id).first()
+    def ingredients_connection(
+        self, info, name: Optional[str] = None,
+        first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+    ) -> IngredientConnection:
+        fields = connection_fields(root_fields(info))
+        queryset = optimize_ingredients(models.Ingredient.objects.all(), fields, required=('name',))
+        queryset = filter_search(queryset, name)
+        return paginate_connection(
+            INGREDIENT_KEYSET, queryset, IngredientEdge, IngredientConnection, first, after, last, before
+        )
 
     @strawberry.field
-    def recipes(self, name: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None) -> List[RecipeType]:
-        queryset = models.Recipe.objects.prefetch_related('recipeingredient_set__ingredient').all()
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        if offset is not None:
-            queryset = queryset[offset:]
-        if limit is not None:
-            queryset = queryset[:limit]
-        return queryset
+    def ingredient(self, info, id: int) -> Optional[IngredientType]:
+        return get_first(optimize_ingredients(models.Ingredient.objects.filter(id=id), root_fields(info)))
 
     @strawberry.field
-    def recipe(self, id: int) -> Optional[RecipeType]:
-        return models.Recipe.objects.prefetch_related('recipeingredient_set__ingredient').filter(id=id).first()
+    def recipes(
+        self, info, name: Optional[str] = None, limit: Optional[int] = None, offset: Optional[int] = None,
+        min_ingredients: Optional[int] = None, max_ingredients: Optional[int] = None,
+    ) -> List[RecipeType]:
+        queryset = optimize_recipes(models.Recipe.objects.all(), root_fields(info))
+        queryset = filter_ingredient_count(queryset, min_ingredients, max_ingredients)
+        limit = clamp_page_size(limit, default=settings.RECIPES_MAX_PAGE_SIZE)
+        return then(fetch_window(queryset, name, limit, offset or 0), get_loaders(info).prepare)
+
+    @strawberry.field
+    def recipes_connection(
+        self, info, name: Optional[str] = None,
+        first: Optional[int] = None, after: Optional[str] = None,
+        last: Optional[int] = None, before: Optional[str] = None,
+        min_ingredients: Optional[int] = None, max_ingredients: Optional[int] = None, ordering: Optional[str] = None,
+    ) -> RecipeConnection:
+        if ordering is not None and ordering not in RECIPE_KEYSETS:
+            raise ValueError(f"Unknown ordering '{ordering}'. Use one of: {', '.join(RECIPE_KEYSETS)}")
+        keyset = RECIPE_KEYSETS[ordering] if ordering else RECIPE_KEYSET
+        fields = connection_fields(root_fields(info))
+        queryset = optimize_recipes(models.Recipe.objects.all(), fields, required=[field for field, _ in keyset.fields])
+        queryset = filter_ingredient_count(filter_search(queryset, name), min_ingredients, max_ingredients)
+        return paginate_connection(
+            keyset, queryset, RecipeEdge, RecipeConnection, first, after, last, before,
+            prepare=get_loaders(info).prepare,
+        )
+
+    @strawberry.field
+    def recipe(self, info, id: int) -> Optional[RecipeType]:
+        loaders = get_loaders(info)
+        recipe = get_first(optimize_recipes(models.Recipe.objects.filter(id=id), root_fields(info)))
+        return then(recipe, lambda recipe: recipe and loaders.prepare([recipe])[0])
+
+    @strawberry.field
+    @thread_when_async
+    def shopping_list(self, recipes: List[ShoppingListRecipeInput]) -> List[ShoppingListUnitType]:
+        check_batch_size(recipes)
+        multipliers = to_multipliers((item.recipe_id, item.multiplier) for item in recipes)
+        return [
+            ShoppingListUnitType(unit=group['unit'], ingredients=[
+                ShoppingListItemType(
+                    ingredient_id=item['id'], name=item['name'],
+                    quantity=float(item['quantity']), recipe_count=item['recipe_count'],
+                )
+                for item in group['ingredients']
+            ])
+            for group in shopping_list(multipliers)
+        ]
+
+    @strawberry.field
+    @thread_when_async
+    def scale_recipes(self, recipes: List[ShoppingListRecipeInput], to: Optional[str] = None) -> List[ScaledIngredientType]:
+        # to: 'base' (g, ml, piece) or a unit code; None keeps each ingredient's unit
+        check_batch_size(recipes)
+        multipliers = to_multipliers((item.recipe_id, item.multiplier) for item in recipes)
+        return [ScaledIngredientType(**row) for row in scaled_recipe_ingredients(multipliers, to)]
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
+    @thread_when_async
     def create_ingredient(self, input: IngredientInput) -> IngredientType:
         serializer = IngredientSerializer(data=input.__dict__)
         serializer.is_valid(raise_exception=True)
         return serializer.save()
 
     @strawberry.mutation
+    @thread_when_async
     def update_ingredient(self, id: int, input: IngredientInput) -> Optional[IngredientType]:
         try:
             ingredient = models.Ingredient.objects.get(id=id)
@@ -58,6 +182,7 @@ class Mutation:
             return None
 
     @strawberry.mutation
+    @thread_when_async
     def delete_ingredient(self, id: int) -> bool:
         try:
             models.Ingredient.objects.get(id=id).delete()
@@ -66,48 +191,57 @@ class Mutation:
             return False
 
     @strawberry.mutation
+    @thread_when_async
     def create_recipe(self, input: RecipeInput, info) -> RecipeType:
-        user = info.context.request.user
-        recipe = models.Recipe.objects.create(
+        return services.create_recipe(
             name=input.name,
             description=input.description,
-            created_by=user
+            created_by=info.context.request.user,
+            quantities=ingredient_quantities(input) or {},
         )
-        for ingredient_id in input.ingredients:
-            ingredient = models.Ingredient.objects.get(id=ingredient_id)
-            models.RecipeIngredient.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                quantity=1.0  # Default quantity
-            )
-        return recipe
 
     @strawberry.mutation
+    @thread_when_async
     def update_recipe(self, id: int, input: UpdateRecipeInput) -> Optional[RecipeType]:
         try:
-            recipe = models.Recipe.objects.get(id=id)
-            if input.name is not None:
-                recipe.name = input.name
-            if input.description is not None:
-                recipe.description = input.description
-            recipe.save()
-
-            if input.ingredients is not None:
-                # Remove existing ingredients
-                models.RecipeIngredient.objects.filter(recipe=recipe).delete()
-                # Add new ingredients
-                for ingredient_id in input.ingredients:
-                    ingredient = models.Ingredient.objects.get(id=ingredient_id)
-                    models.RecipeIngredient.objects.create(
-                        recipe=recipe,
-                        ingredient=ingredient,
-                        quantity=1.0  # Default quantity
-                    )
-            return recipe
+            return services.update_recipe(
+                models.Recipe.objects.get(id=id),
+                name=input.name,
+                description=input.description,
+                quantities=ingredient_quantities(input),
+            )
         except (models.Recipe.DoesNotExist, models.Ingredient.DoesNotExist):
             return None
 
     @strawberry.mutation
+    @thread_when_async
+    def create_recipes(self, info, inputs: List[RecipeInput]) -> List[RecipeBatchResult]:
+        check_batch_size(inputs)
+        results = services.bulk_create_recipes(
+            [
+                {'name': input.name, 'description': input.description, 'quantities': ingredient_quantities(input) or {}}
+                for input in inputs
+            ],
+            created_by=info.context.request.user,
+        )
+        get_loaders(info).prepare([result.obj for result in results if result.obj is not None])
+        return [RecipeBatchResult(index=result.index, recipe=result.obj, error=result.error) for result in results]
+
+    @strawberry.mutation
+    @thread_when_async
+    def add_ingredients_to_recipe(self, inputs: List[RecipeIngredientInput]) -> List[RecipeIngredientBatchResult]:
+        check_batch_size(inputs)
+        results = services.bulk_add_ingredients([
+            {'recipe_id': input.recipe_id, 'ingredient_id': input.ingredient_id, 'quantity': input.quantity}
+            for input in inputs
+        ])
+        return [
+            RecipeIngredientBatchResult(index=result.index, recipe_ingredient=result.obj, error=result.error)
+            for result in results
+        ]
+
+    @strawberry.mutation
+    @thread_when_async
     def add_ingredient_to_recipe(self, input: RecipeIngredientInput) -> Optional[RecipeIngredientType]:
         try:
             recipe = models.Recipe.objects.get(id=input.recipe_id)
@@ -125,6 +259,7 @@ class Mutation:
             return None
 
     @strawberry.mutation
+    @thread_when_async
     def remove_ingredient_from_recipe(self, recipe_id: int, ingredient_id: int) -> bool:
         try:
             models.RecipeIngredient.objects.filter(
@@ -135,4 +270,4 @@ class Mutation:
         except models.RecipeIngredient.DoesNotExist:
             return False
 
-schema = strawberry.Schema(query=Query, mutation=Mutation) 
\ No newline at end of file
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[ReadOnlyQueryExtension, DocumentCacheExtension, QueryCostExtension, ResponseCacheExtension]) 
\ No newline at end of file
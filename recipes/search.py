@@ -0,0 +1,98 @@
+import re
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Ingredient, Recipe
+
+# Indexed search over Ingredient.name and Recipe.name/description.
+#
+# SQLite uses the FTS5 tables created in migration 0003 (kept in sync by
+# triggers), PostgreSQL the trigram and tsvector GIN indexes from 0003 and
+# 0004. Other backends fall back to icontains.
+
+FTS_TABLES = {
+    Ingredient: 'recipes_ingredient_fts',
+    Recipe: 'recipes_recipe_fts',
+}
+
+
+def search_terms(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def fts_match_expression(terms):
+    # Every term must match, the last one (still being typed) as a prefix
+    return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def vendor(queryset):
+    return connections[queryset.db].vendor
+
+
+def postgres_rank(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    if queryset.model is Ingredient:
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset.annotate(search_rank=TrigramWordSimilarity(' '.join(terms), 'name'))
+    vector = SearchVector('name', weight='A', config='english') + SearchVector('description', weight='B', config='english')
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='english')
+    return queryset.annotate(search_vector=vector).filter(search_vector=query).annotate(
+        search_rank=SearchRank(vector, query)
+    )
+
+
+def filter_search(queryset, text):
+    """Restrict ``queryset`` to rows matching ``text`` without changing its ordering."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    backend = vendor(queryset)
+    if backend == 'sqlite':
+        table = FTS_TABLES[queryset.model]
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [fts_match_expression(terms)]
+        ))
+    if backend == 'postgresql':
+        return postgres_rank(queryset, terms)
+    fields = ['name'] if queryset.model is Ingredient else ['name', 'description']
+    for term in terms:
+        queryset = queryset.filter(Q(*[Q(**{f'{field}__icontains': term}) for field in fields], _connector=Q.OR))
+    return queryset
+
+
+def ranked_search(queryset, text, limit, offset=0):
+    """Return the ``limit`` best matches for ``text``, best first."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset[offset:offset + limit]
+    backend = vendor(queryset)
+    if backend == 'sqlite':
+        table = FTS_TABLES[queryset.model]
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s OFFSET %s',
+                [fts_match_expression(terms), limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return queryset.none()
+        position = Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)], output_field=IntegerField())
+        return queryset.filter(pk__in=ids).order_by(position)
+    if backend == 'postgresql':
+        return postgres_rank(queryset, terms).order_by('-search_rank', 'pk')[offset:offset + limit]
+    return filter_search(queryset, text)[offset:offset + limit]
+
+
+def rebuild_search_index(using='default'):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for table in FTS_TABLES.values():
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            for index in ('ingredient_name_upper_trgm_idx', 'recipe_name_trgm_idx', 'recipe_search_vector_idx'):
+                cursor.execute(f'REINDEX INDEX {index}')
@@ -1,11 +1,21 @@
 from rest_framework import serializers
 from .models import Ingredient, Recipe, RecipeIngredient
+from .units import UNITS, normalize_unit
 
 class IngredientSerializer(serializers.ModelSerializer):
+    # Accepts aliases ("grams", "Tbsp") and stores the canonical code
+    unit = serializers.CharField(max_length=50)
+
     class Meta:
         model = Ingredient
         fields = ['id', 'name', 'unit', 'created_at', 'updated_at']
 
+    def validate_unit(self, value):
+        unit = normalize_unit(value)
+        if unit is None:
+            raise serializers.ValidationError(f"Unknown unit '{value}'. Use one of: {', '.join(UNITS)}.")
+        return unit
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
@@ -13,11 +23,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
 class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
-    ingredient_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ['id', 'name', 'description', 'created_by', 'created_at', 'updated_at', 'ingredients', 'ingredient_count']
-
-    def get_ingredient_count(self, obj):
-        return obj.ingredient_count 
\ No newline at end of file
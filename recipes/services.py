@@ -0,0 +1,249 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Ingredient, Recipe, RecipeIngredient
+from .response_cache import invalidate_recipes
+
+DEFAULT_QUANTITY = Decimal('1.00')
+BULK_CHUNK_SIZE = 500
+
+
+def to_quantity(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def validate_ingredient_ids(ingredient_ids):
+    # One in_bulk query for the whole list instead of an Ingredient.objects.get per id
+    found = Ingredient.objects.in_bulk(set(ingredient_ids))
+    missing = set(ingredient_ids) - set(found)
+    if missing:
+        raise Ingredient.DoesNotExist(f"Ingredient(s) not found: {', '.join(map(str, sorted(missing)))}")
+    return found
+
+
+def set_recipe_ingredients(recipe, quantities, existing=None):
+    """Make ``recipe``'s ingredients exactly ``quantities`` ({ingredient_id: quantity}).
+
+    A quantity of None keeps the current quantity (or DEFAULT_QUANTITY for a
+    newly added ingredient). Only rows that differ are written: new ingredients
+    are inserted with one bulk_create, changed quantities go through one
+    bulk_update and dropped ingredients through one DELETE.
+    """
+    quantities = {ingredient_id: to_quantity(quantity) for ingredient_id, quantity in quantities.items()}
+    validate_ingredient_ids(quantities)
+    if existing is None:
+        existing = {row.ingredient_id: row for row in RecipeIngredient.objects.filter(recipe=recipe)}
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for ingredient_id, quantity in quantities.items():
+        row = existing.get(ingredient_id)
+        if row is None:
+            to_create.append(RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, quantity=DEFAULT_QUANTITY if quantity is None else quantity
+            ))
+        elif quantity is not None and row.quantity != quantity:
+            row.quantity = quantity
+            row.updated_at = now
+            to_update.append(row)
+    to_delete = [row.id for ingredient_id, row in existing.items() if ingredient_id not in quantities]
+
+    if to_create:
+        RecipeIngredient.objects.bulk_create(to_create)
+    if to_update:
+        RecipeIngredient.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+    if to_delete:
+        RecipeIngredient.objects.filter(id__in=to_delete).delete()
+    if to_create or to_update:
+        # bulk_create/bulk_update send no model signals
+        invalidate_recipes([recipe.id])
+    # What the triggers just stored, without reading it back
+    recipe.ingredient_count = len(quantities)
+
+
+@transaction.atomic
+def create_recipe(name, description, created_by, quantities):
+    recipe = Recipe.objects.create(name=name, description=description, created_by=created_by)
+    set_recipe_ingredients(recipe, quantities, existing={})
+    return recipe
+
+
+@transaction.atomic
+def update_recipe(recipe, name=None, description=None, quantities=None):
+    if name is not None:
+        recipe.name = name
+    if description is not None:
+        recipe.description = description
+    recipe.save()
+    if quantities is not None:
+        set_recipe_ingredients(recipe, quantities)
+    return recipe
+
+
+@dataclass
+class BatchResult:
+    index: int
+    obj: object = None
+    error: str = None
+    created: bool = True  # False when an existing row was updated
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(model, ids):
+    return set(model.objects.only('id').in_bulk(set(ids)))
+
+
+def related_objects(model, ids):
+    return model.objects.in_bulk(set(ids))
+
+
+def bulk_create_ingredients(items, chunk_size=BULK_CHUNK_SIZE):
+    """Create Ingredients from validated ``{'name', 'unit'}`` dicts, one transaction per chunk."""
+    results = []
+    for chunk in chunked(list(enumerate(items)), chunk_size):
+        with transaction.atomic():
+            created = Ingredient.objects.bulk_create([Ingredient(**item) for _, item in chunk])
+        results.extend(BatchResult(index, ingredient) for (index, _), ingredient in zip(chunk, created))
+    return results
+
+
+def bulk_create_recipes(items, created_by, chunk_size=BULK_CHUNK_SIZE):
+    """Create recipes from ``{'name', 'description', 'quantities'}`` dicts.
+
+    Every ingredient id in the batch is checked with one query up front; items
+    referencing unknown ingredients are reported and skipped, the rest are
+    written with two bulk_creates per chunk.
+    """
+    known = existing_ids(Ingredient, [i for item in items for i in item['quantities']])
+    results, valid = {}, []
+    for index, item in enumerate(items):
+        missing = set(item['quantities']) - known
+        if missing:
+            results[index] = BatchResult(index, error=f"Ingredient(s) not found: {', '.join(map(str, sorted(missing)))}")
+        else:
+            valid.append((index, item))
+
+    for chunk in chunked(valid, chunk_size):
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create([
+                Recipe(name=item['name'], description=item['description'], created_by=created_by)
+                for _, item in chunk
+            ])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe=recipe, ingredient_id=ingredient_id,
+                    quantity=DEFAULT_QUANTITY if quantity is None else to_quantity(quantity),
+                )
+                for recipe, (_, item) in zip(recipes, chunk)
+                for ingredient_id, quantity in item['quantities'].items()
+            ])
+        invalidate_recipes([recipe.id for recipe in recipes])
+        for recipe, (index, item) in zip(recipes, chunk):
+            recipe.ingredient_count = len(item['quantities'])
+            results[index] = BatchResult(index, recipe)
+    return [results[index] for index in range(len(items))]
+
+
+def bulk_add_ingredients(items, chunk_size=BULK_CHUNK_SIZE):
+    """Add or update ``{'recipe_id', 'ingredient_id', 'quantity'}`` rows in bulk.
+
+    Same semantics as adding one ingredient at a time: an existing
+    (recipe, ingredient) row gets its quantity replaced.
+    """
+    # Loaded in full so the returned rows can be rendered without further queries
+    known_recipes = related_objects(Recipe, [item['recipe_id'] for item in items])
+    known_ingredients = related_objects(Ingredient, [item['ingredient_id'] for item in items])
+    results, valid = {}, {}
+    for index, item in enumerate(items):
+        if item['recipe_id'] not in known_recipes:
+            results[index] = BatchResult(index, error=f"Recipe not found: {item['recipe_id']}")
+        elif item['ingredient_id'] not in known_ingredients:
+            results[index] = BatchResult(index, error=f"Ingredient not found: {item['ingredient_id']}")
+        else:
+            # A pair repeated within the batch keeps its last quantity
+            valid[(item['recipe_id'], item['ingredient_id'])] = (index, to_quantity(item['quantity']))
+
+    now = timezone.now()
+    pairs = list(valid.items())
+    for chunk in chunked(pairs, chunk_size):
+        recipe_ids = {recipe_id for (recipe_id, _), _ in chunk}
+        ingredient_ids = {ingredient_id for (_, ingredient_id), _ in chunk}
+        existing = {
+            (row.recipe_id, row.ingredient_id): row
+            for row in RecipeIngredient.objects.filter(recipe_id__in=recipe_ids, ingredient_id__in=ingredient_ids)
+        }
+        to_create, to_update = [], []
+        for (recipe_id, ingredient_id), (index, quantity) in chunk:
+            row = existing.get((recipe_id, ingredient_id))
+            created = row is None
+            if created:
+                row = RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, quantity=quantity)
+                to_create.append(row)
+            elif row.quantity != quantity:
+                row.quantity = quantity
+                row.updated_at = now
+                to_update.append(row)
+            row.recipe = known_recipes[recipe_id]
+            row.ingredient = known_ingredients[ingredient_id]
+            results[index] = BatchResult(index, row, created=created)
+        with transaction.atomic():
+            RecipeIngredient.objects.bulk_create(to_create)
+            RecipeIngredient.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+            invalidate_recipes({row.recipe_id for row in to_create + to_update})
+        for row in to_create:
+            known_recipes[row.recipe_id].ingredient_count += 1
+
+    # Earlier duplicates of a pair point at the row written for the last one,
+    # which counts as the one creating it
+    for index, item in enumerate(items):
+        if index not in results:
+            last_index, _ = valid[(item['recipe_id'], item['ingredient_id'])]
+            results[index] = BatchResult(index, results[last_index].obj, created=False)
+    return [results[index] for index in range(len(items))]
+
+
+def actual_ingredient_count():
+    """Expression counting a Recipe's RecipeIngredient rows, for comparing with or resetting ingredient_count."""
+    counts = (
+        RecipeIngredient.objects.filter(recipe=OuterRef('pk'))
+        .order_by().values('recipe').annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def ingredient_count_mismatches(using=DEFAULT_DB_ALIAS, chunk_size=BULK_CHUNK_SIZE * 20):
+    """Yield ``(recipe_id, stored, actual)`` for every recipe whose ingredient_count is wrong.
+
+    Walks the table in id ranges of ``chunk_size`` recipes, two indexed queries per range.
+    """
+    recipes = Recipe.objects.using(using).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(recipes.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield from (
+            recipes.filter(id__gte=ids[0], id__lte=ids[-1])
+            .annotate(actual=actual_ingredient_count())
+            .exclude(ingredient_count=F('actual'))
+            .values_list('id', 'ingredient_count', 'actual')
+        )
+        last_id = ids[-1]
+
+
+def repair_ingredient_counts(recipe_ids, using=DEFAULT_DB_ALIAS):
+    """Recount ingredient_count of ``recipe_ids`` in one UPDATE; returns the number of recipes updated."""
+    updated = Recipe.objects.using(using).filter(id__in=recipe_ids).update(ingredient_count=actual_ingredient_count())
+    invalidate_recipes(recipe_ids)
+    return updated
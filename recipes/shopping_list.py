@@ -0,0 +1,69 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import groupby
+
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+
+from .models import RecipeIngredient
+from .services import to_quantity
+
+TOTAL_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def to_multipliers(items):
+    """{recipe_id: Decimal multiplier} from (recipe_id, multiplier) pairs; a repeated recipe adds up."""
+    multipliers = defaultdict(Decimal)
+    for recipe_id, multiplier in items:
+        multiplier = Decimal(str(multiplier))
+        if multiplier <= 0:
+            raise ValueError(f'Multiplier for recipe {recipe_id} must be positive')
+        multipliers[recipe_id] += multiplier
+    return dict(multipliers)
+
+
+def shopping_list_queryset(multipliers):
+    """Total quantity per ingredient over ``multipliers`` ({recipe_id: multiplier}), as one GROUP BY query."""
+    # One CASE branch per distinct multiplier, not per recipe: a 1000-recipe
+    # list usually has a handful of serving sizes
+    recipes_by_multiplier = defaultdict(list)
+    for recipe_id, multiplier in multipliers.items():
+        recipes_by_multiplier[multiplier].append(recipe_id)
+    if len(recipes_by_multiplier) == 1:
+        factor = Value(next(iter(recipes_by_multiplier)), output_field=TOTAL_FIELD)
+    else:
+        factor = Case(
+            *[When(recipe_id__in=ids, then=Value(multiplier)) for multiplier, ids in recipes_by_multiplier.items()],
+            output_field=TOTAL_FIELD,
+        )
+    return (
+        RecipeIngredient.objects.filter(recipe_id__in=multipliers)
+        .values('ingredient_id', 'ingredient__name', 'ingredient__unit')
+        .annotate(total=Sum(F('quantity') * factor, output_field=TOTAL_FIELD), recipe_count=Count('recipe_id'))
+        .order_by('ingredient__unit', 'ingredient__name', 'ingredient_id')
+    )
+
+
+def shopping_list(multipliers):
+    """Aggregated ingredients for ``multipliers``, grouped by unit.
+
+    Returns ``[{'unit', 'ingredients': [{'id', 'name', 'quantity', 'recipe_count'}]}]``
+    ordered by unit, then ingredient name. Unknown recipe ids add nothing.
+    """
+    if not multipliers:
+        return []
+    rows = shopping_list_queryset(multipliers)
+    return [
+        {
+            'unit': unit,
+            'ingredients': [
+                {
+                    'id': row['ingredient_id'],
+                    'name': row['ingredient__name'],
+                    'quantity': to_quantity(row['total']),
+                    'recipe_count': row['recipe_count'],
+                }
+                for row in group
+            ],
+        }
+        for unit, group in groupby(rows, key=lambda row: row['ingredient__unit'])
+    ]
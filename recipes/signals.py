@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import Ingredient, Recipe, RecipeIngredient
+from .response_cache import invalidate_recipes
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Deactivation, password changes and deletes must not be served from the token cache
+    user_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_recipes(sender, instance, update_fields=None, **kwargs):
+    # Recipes show their author's name; logins only touch last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_recipes(Recipe.objects.filter(created_by_id=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient(sender, instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def track_ingredient_count(sender, instance, created=None, **kwargs):
+    # The triggers have updated the stored count; a Recipe loaded with the row (e.g. the
+    # one a mutation returns) gets the same change so it doesn't show the old count
+    if created is not False and RecipeIngredient.recipe.is_cached(instance):
+        instance.recipe.ingredient_count += 1 if created else -1
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_recipes(sender, instance, created=False, **kwargs):
+    # Deleted ingredients take their RecipeIngredient rows (and signals) with them
+    if not created:
+        invalidate_recipes(RecipeIngredient.objects.filter(ingredient_id=instance.pk).values_list('recipe_id', flat=True))
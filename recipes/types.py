@@ -1,6 +1,7 @@
 import strawberry
 from typing import List, Optional
-from . import models
+from strawberry.types import Info
+from .loaders import get_loaders
 
 @strawberry.type
 class IngredientType:
@@ -25,25 +26,93 @@ class RecipeType:
     created_by: str
     created_at: str
     updated_at: str
+    ingredient_count: int
 
     @strawberry.field
-    def ingredients(self) -> List[RecipeIngredientType]:
-        return models.RecipeIngredient.objects.filter(recipe_id=self.id).select_related('ingredient')
+    def ingredients(self, info: Info) -> List[RecipeIngredientType]:
+        return get_loaders(info).ingredients.load(self.id)
 
-    @strawberry.field
-    def ingredient_count(self) -> int:
-        return models.RecipeIngredient.objects.filter(recipe_id=self.id).count()
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    has_previous_page: bool
+    start_cursor: Optional[str]
+    end_cursor: Optional[str]
+
+@strawberry.type
+class IngredientEdge:
+    cursor: str
+    node: IngredientType
+
+@strawberry.type
+class IngredientConnection:
+    edges: List[IngredientEdge]
+    page_info: PageInfo
+
+@strawberry.type
+class RecipeEdge:
+    cursor: str
+    node: RecipeType
+
+@strawberry.type
+class RecipeConnection:
+    edges: List[RecipeEdge]
+    page_info: PageInfo
+
+@strawberry.type
+class RecipeBatchResult:
+    index: int
+    recipe: Optional[RecipeType] = None
+    error: Optional[str] = None
+
+@strawberry.type
+class RecipeIngredientBatchResult:
+    index: int
+    recipe_ingredient: Optional[RecipeIngredientType] = None
+    error: Optional[str] = None
+
+@strawberry.type
+class ShoppingListItemType:
+    ingredient_id: int
+    name: str
+    quantity: float
+    recipe_count: int
+
+@strawberry.type
+class ShoppingListUnitType:
+    unit: str
+    ingredients: List[ShoppingListItemType]
+
+@strawberry.type
+class ScaledIngredientType:
+    id: int
+    recipe_id: int
+    ingredient_id: int
+    name: str
+    quantity: float
+    unit: str
+
+@strawberry.input
+class ShoppingListRecipeInput:
+    recipe_id: int
+    multiplier: float = 1.0  # serving multiplier
 
 @strawberry.input
 class IngredientInput:
     name: str
     unit: str
 
+@strawberry.input
+class IngredientQuantityInput:
+    ingredient_id: int
+    quantity: float
+
 @strawberry.input
 class RecipeInput:
     name: str
     description: str
-    ingredients: List[int]
+    ingredients: Optional[List[int]] = None  # List of ingredient IDs, added with quantity 1.0
+    ingredient_quantities: Optional[List[IngredientQuantityInput]] = None
 
 @strawberry.input
 class RecipeIngredientInput:
@@ -55,4 +124,5 @@ class RecipeIngredientInput:
 class UpdateRecipeInput:
     name: Optional[str] = None
     description: Optional[str] = None
-    ingredients: Optional[List[int]] = None  # List of ingredient IDs 
\ No newline at end of file
+    ingredients: Optional[List[int]] = None  # List of ingredient IDs, existing quantities are kept
+    ingredient_quantities: Optional[List[IngredientQuantityInput]] = None
@@ -0,0 +1,103 @@
+"""
+Canonical units and vectorized quantity scaling/conversion.
+
+Every Ingredient.unit is one of the codes in UNITS. Each unit belongs to a
+dimension (mass, volume, count) and has a factor to that dimension's base
+unit (g, ml, piece), so quantities in different units of one dimension can
+be compared, summed and converted.
+
+convert() works on whole columns of quantities at once: the conversion
+ratio is worked out once per unit code, then applied to every row in a
+handful of NumPy array operations, so no Decimal arithmetic is done per row.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+MASS, VOLUME, COUNT = 'mass', 'volume', 'count'
+BASE_UNITS = {MASS: 'g', VOLUME: 'ml', COUNT: 'piece'}
+
+Unit = namedtuple('Unit', 'code dimension factor aliases')
+
+UNITS = {unit.code: unit for unit in [
+    Unit('mg', MASS, 0.001, ('milligram', 'milligrams')),
+    Unit('g', MASS, 1.0, ('gr', 'gram', 'grams', 'gramme', 'grammes')),
+    Unit('kg', MASS, 1000.0, ('kilo', 'kilos', 'kilogram', 'kilograms')),
+    Unit('oz', MASS, 28.349523125, ('ounce', 'ounces')),
+    Unit('lb', MASS, 453.59237, ('lbs', 'pound', 'pounds')),
+    Unit('ml', VOLUME, 1.0, ('millilitre', 'millilitres', 'milliliter', 'milliliters')),
+    Unit('l', VOLUME, 1000.0, ('litre', 'litres', 'liter', 'liters')),
+    Unit('tsp', VOLUME, 4.92892159375, ('teaspoon', 'teaspoons')),
+    Unit('tbsp', VOLUME, 14.78676478125, ('tablespoon', 'tablespoons')),
+    Unit('fl_oz', VOLUME, 29.5735295625, ('fl oz', 'fluid ounce', 'fluid ounces')),
+    Unit('cup', VOLUME, 236.5882365, ('cups',)),
+    Unit('pinch', VOLUME, 0.308057599609375, ('pinches',)),  # 1/16 tsp
+    Unit('piece', COUNT, 1.0, ('pieces', 'pc', 'pcs', 'each', 'unit', 'units')),
+    Unit('dozen', COUNT, 12.0, ('doz',)),
+]}
+UNIT_CHOICES = [(code, code) for code in UNITS]
+# Stored for values the migration couldn't recognise
+DEFAULT_UNIT = 'piece'
+
+_INDEX = {code: i for i, code in enumerate(UNITS)}
+_LOOKUP = {alias: unit.code for unit in UNITS.values() for alias in (unit.code, *unit.aliases)}
+
+
+def normalize_unit(text):
+    """The canonical code for ``text`` (a code or alias, any case), or None."""
+    return _LOOKUP.get(' '.join(str(text).lower().replace('.', ' ').split()))
+
+
+def target_unit(unit, to):
+    """The unit a quantity in ``unit`` is converted to (see convert())."""
+    if to is None:
+        return unit
+    if to == 'base':
+        return BASE_UNITS[UNITS[unit].dimension]
+    if to not in UNITS:
+        raise ValueError(f"Unknown unit '{to}'")
+    return to if UNITS[to].dimension == UNITS[unit].dimension else unit
+
+
+def convert(quantities, units, multipliers=1.0, to=None):
+    """Scale and convert a column of quantities.
+
+    ``quantities`` and ``units`` are parallel sequences; ``multipliers`` is a
+    number or a parallel sequence. ``to`` is None (keep each unit), 'base'
+    (each dimension's base unit) or a unit code (rows of other dimensions keep
+    their unit). Returns ``(values, units)`` as lists, values rounded to 2 places.
+    """
+    # One target and ratio per unit code, picked for every row by its code's index
+    targets = np.array([target_unit(code, to) for code in UNITS], dtype=object)
+    ratios = np.array([UNITS[code].factor / UNITS[target].factor for code, target in zip(UNITS, targets)])
+    index = np.fromiter(map(_INDEX.__getitem__, units), dtype=np.intp, count=len(units))
+    values = np.asarray(quantities, dtype=np.float64) * np.asarray(multipliers, dtype=np.float64)
+    return np.round(values * ratios[index], 2).tolist(), targets[index].tolist()
+
+
+def scaled_recipe_ingredients(multipliers, to=None):
+    """Every RecipeIngredient of ``multipliers`` ({recipe_id: multiplier}) scaled and converted.
+
+    One query; quantities come back as floats so no Decimal is built per row.
+    Returns ``[{'id', 'recipe_id', 'ingredient_id', 'name', 'quantity', 'unit'}]``.
+    """
+    from .models import RecipeIngredient
+
+    rows = list(
+        RecipeIngredient.objects.filter(recipe_id__in=multipliers)
+        .order_by('recipe_id', 'id')
+        .annotate(amount=Cast(F('quantity'), FloatField()))
+        .values_list('id', 'recipe_id', 'ingredient_id', 'ingredient__name', 'ingredient__unit', 'amount')
+    )
+    if not rows:
+        return []
+    ids, recipe_ids, ingredient_ids, names, units, amounts = zip(*rows)
+    values, targets = convert(amounts, units, [float(multipliers[recipe_id]) for recipe_id in recipe_ids], to)
+    return [
+        {'id': row_id, 'recipe_id': recipe_id, 'ingredient_id': ingredient_id, 'name': name,
+         'quantity': value, 'unit': unit}
+        for row_id, recipe_id, ingredient_id, name, value, unit
+        in zip(ids, recipe_ids, ingredient_ids, names, values, targets)
+    ]
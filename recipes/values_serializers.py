@@ -0,0 +1,149 @@
+"""
+Read-only fast path for list endpoints: ModelSerializer output built from values() rows.
+
+A ValuesSerializer is compiled once from a ModelSerializer class into one
+generated function per serializer that turns a values() dict into the output
+dict, with the same keys in the same order and the same value formatting, so
+the rendered JSON is byte for byte what the ModelSerializer gives. Nested
+``many=True`` serializers over a many-to-many field are filled from one more
+values() query per list, in the order a prefetch would return them.
+
+Only what the compiler can reproduce exactly is accepted: fields reading one
+column, primary-key related fields and nested serializers over a
+many-to-many field. Anything else raises ImproperlyConfigured when the
+ValuesSerializer is first used.
+"""
+import datetime
+from collections import defaultdict
+from functools import cached_property
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import ISO_8601, fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import IngredientSerializer, RecipeSerializer
+
+PARENT_KEY = '_values_parent_id'
+
+
+def is_iso_datetime(field):
+    # The stock DateTimeField output: in the current time zone, ISO 8601 with 'Z' for UTC
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (
+        type(field) is drf_fields.DateTimeField
+        and isinstance(output_format, str) and output_format.lower() == ISO_8601
+        and not hasattr(field, 'timezone')
+    )
+
+
+def iso_datetime(tz):
+    # DateTimeField.enforce_timezone() and to_representation() without the per-call
+    # lookups; values repeat a lot (nested rows), so each is formatted once per list
+    formatted = {}
+
+    def convert(value):
+        try:
+            return formatted[value]
+        except KeyError:
+            pass
+        aware = value.utcoffset() is not None
+        if tz is not None:
+            result = value.astimezone(tz) if aware else timezone.make_aware(value, tz)
+        else:
+            result = timezone.make_naive(value, datetime.timezone.utc) if aware else value
+        result = result.isoformat()
+        if result.endswith('+00:00'):
+            result = result[:-6] + 'Z'
+        formatted[value] = result
+        return result
+    return convert
+
+
+class ValuesSerializer:
+    """Serialize lists of ``serializer_class`` instances from values() rows instead of model instances.
+
+    ``queryset(qs)`` selects the columns the output needs; ``to_representation(rows)``
+    turns the rows it returns into what ``serializer_class(instances, many=True).data`` would be.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def compiled(self):
+        serializer = self.serializer_class()
+        model = self.serializer_class.Meta.model
+        columns, lines, converters, nested = [], [], {}, {}
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = model._meta.get_field(field.source)
+                if not isinstance(relation, models.ManyToManyField):
+                    raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name}: only many-to-many fields can be nested')
+                nested[name] = (ValuesSerializer(type(field.child)), relation)
+                lines.append(f'{name!r}: nested[{name!r}].get(row[{model._meta.pk.name!r}], [])')
+                continue
+            if '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name}: source {field.source!r} is not a column')
+            model_field = model._meta.get_field(field.source)
+            column = model_field.name
+            columns.append(column)
+            value = f'row[{column!r}]'
+            if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                pass  # values() already gives the related id
+            elif type(field) in (drf_fields.IntegerField, drf_fields.CharField) and isinstance(
+                model_field, (models.IntegerField, models.AutoField, models.CharField, models.TextField)
+            ):
+                pass  # int(value) / str(value) of what the column already holds
+            elif is_iso_datetime(field):
+                converters[name] = None  # bound to the current time zone per call
+                value = f'(None if {value} is None else convert[{name!r}]({value}))'
+            else:
+                converters[name] = field.to_representation
+                value = f'(None if {value} is None else convert[{name!r}]({value}))'
+            lines.append(f'{name!r}: {value}')
+        if model._meta.pk.name not in columns and nested:
+            columns.append(model._meta.pk.name)
+        source = 'def to_dict(row, convert, nested):\n    return {%s}\n' % ', '.join(lines)
+        namespace = {}
+        exec(compile(source, f'<ValuesSerializer {self.serializer_class.__name__}>', 'exec'), namespace)
+        return columns, namespace['to_dict'], converters, nested
+
+    @property
+    def columns(self):
+        return self.compiled[0]
+
+    def queryset(self, queryset):
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def to_representation(self, rows, using=None):
+        _, to_dict, converters, nested = self.compiled
+        rows = list(rows)
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        convert = {name: converter or iso_datetime(tz) for name, converter in converters.items()}
+        children = {name: self.related(serializer, relation, rows, using) for name, (serializer, relation) in nested.items()}
+        return [to_dict(row, convert, children) for row in rows]
+
+    def related(self, serializer, relation, rows, using):
+        # {parent id: [child dict]}, in the related model's default ordering like a prefetch
+        ids = [row[relation.model._meta.pk.name] for row in rows]
+        if not ids:
+            return {}
+        query_name = relation.related_query_name()
+        child_rows = relation.related_model._default_manager.using(using).filter(**{f'{query_name}__in': ids}).values(
+            *serializer.columns, **{PARENT_KEY: F(query_name)}
+        )
+        by_parent = defaultdict(list)
+        child_rows = list(child_rows)
+        for row, item in zip(child_rows, serializer.to_representation(child_rows, using)):
+            by_parent[row[PARENT_KEY]].append(item)
+        return by_parent
+
+
+INGREDIENT_VALUES = ValuesSerializer(IngredientSerializer)
+RECIPE_VALUES = ValuesSerializer(RecipeSerializer)
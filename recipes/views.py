@@ -1,18 +1,24 @@
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.permissions import AllowAny
-from strawberry.django.views import GraphQLView
+from strawberry.django.views import AsyncGraphQLView, GraphQLView
 from django.http import JsonResponse
 from rest_framework_simplejwt.tokens import AccessToken
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-import json
 import logging
+import random
+import time
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import CachedJWTAuthentication
+from asgiref.sync import sync_to_async
+from .loaders import AsyncRecipeLoaders, RecipeManagerContext
+from .query_cache import PersistedQueryError, graphql_request_data
 
 # Configure logging
 logger = logging.getLogger(__name__)
+response_logger = logging.getLogger('recipes.graphql')
 
 # Create your views here.
 
@@ -27,35 +33,97 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = (AllowAny,)
     serializer_class = CustomTokenObtainPairSerializer
 
+def authenticate_graphql_request(request):
+    # Sets request.user from the Bearer token, or returns the 401 response to send
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        logger.warning(f"Authentication failed: Missing or invalid Authorization header")
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    token = auth_header.split(' ')[1]
+    try:
+        user, _ = CachedJWTAuthentication().authenticate_token(token)
+        request.user = user
+    except Exception as e:
+        logger.error(f"Invalid token: {str(e)}")
+        return JsonResponse({'error': 'Invalid token'}, status=401)
+    return None
+
+def log_graphql_response(request, response, started_at):
+    # Sampled, size-capped and handed to a queue: the body is neither parsed
+    # nor re-serialised here, the listener thread formats the record.
+    sample_rate = settings.GRAPHQL_RESPONSE_LOG_SAMPLE_RATE
+    if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+        return
+    if not response_logger.isEnabledFor(logging.INFO):
+        return
+    content = getattr(response, 'content', b'')
+    max_bytes = settings.GRAPHQL_RESPONSE_LOG_MAX_BYTES
+    response_logger.info('GraphQL response', extra={'fields': {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'user_id': getattr(request.user, 'pk', None),
+        'duration_ms': round((time.perf_counter() - started_at) * 1000, 2),
+        'bytes': len(content),
+        'truncated': len(content) > max_bytes,
+        'body': content[:max_bytes],
+    }})
+
+def persisted_query_error_response(error):
+    return JsonResponse(error.as_response_data(), status=error.status)
+
 @method_decorator(csrf_exempt, name='dispatch')
 class AuthenticatedGraphQLView(GraphQLView):
+    def get_context(self, request, response):
+        return RecipeManagerContext(request=request, response=response)
+
+    def parse_http_body(self, request):
+        # Same as strawberry's, plus Automatic Persisted Queries (query_cache.py)
+        content_type = request.content_type or ''
+        if 'application/json' in content_type:
+            return graphql_request_data(self.parse_json(request.body))
+        if request.method == 'GET' and not content_type.startswith('multipart/form-data'):
+            return graphql_request_data(self.parse_query_params(request.query_params))
+        return super().parse_http_body(request)
+
     def dispatch(self, request, *args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            logger.warning(f"Authentication failed: Missing or invalid Authorization header")
-            return JsonResponse({'error': 'Authentication required'}, status=401)
-        
-        token = auth_header.split(' ')[1]
+        error_response = authenticate_graphql_request(request)
+        if error_response is not None:
+            return error_response
+
+        started_at = time.perf_counter()
         try:
-            validated = JWTAuthentication().authenticate(request)
-            if validated is not None:
-                user, _ = validated
-                request.user = user
-            else:
-                logger.error("Invalid token: Could not authenticate user")
-                return JsonResponse({'error': 'Invalid token'}, status=401)
-        except Exception as e:
-            logger.error(f"Invalid token: {str(e)}")
-            return JsonResponse({'error': 'Invalid token'}, status=401)
-        
-        response = super().dispatch(request, *args, **kwargs)
-        
-        # Log the response
+            response = super().dispatch(request, *args, **kwargs)
+        except PersistedQueryError as e:
+            response = persisted_query_error_response(e)
+        log_graphql_response(request, response, started_at)
+        return response
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthenticatedGraphQLView(AsyncGraphQLView):
+    # Served under ASGI: resolvers run on the event loop with the async ORM and
+    # DataLoaders, so one worker can interleave many in-flight requests.
+    async def get_context(self, request, response):
+        return RecipeManagerContext(request=request, response=response, loaders=AsyncRecipeLoaders())
+
+    async def parse_http_body(self, request):
+        content_type = request.content_type or ''
+        if 'application/json' in content_type:
+            return graphql_request_data(self.parse_json(await request.get_body()))
+        if request.method == 'GET' and not content_type.startswith('multipart/form-data'):
+            return graphql_request_data(self.parse_query_params(request.query_params))
+        return await super().parse_http_body(request)
+
+    async def dispatch(self, request, *args, **kwargs):
+        error_response = await sync_to_async(authenticate_graphql_request)(request)
+        if error_response is not None:
+            return error_response
+
+        started_at = time.perf_counter()
         try:
-            if hasattr(response, 'content'):
-                response_data = json.loads(response.content)
-                logger.info(f"GraphQL Response: {json.dumps(response_data, indent=2)}")
-        except Exception as e:
-            logger.error(f"Error logging response: {str(e)}")
-        
+            response = await super().dispatch(request, *args, **kwargs)
+        except PersistedQueryError as e:
+            response = persisted_query_error_response(e)
+        log_graphql_response(request, response, started_at)
         return response
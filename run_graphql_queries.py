@@ -1,40 +1,12 @@
-import requests
-
 BASE_URL = "http://localhost:8000"
 LOGIN_URL = f"{BASE_URL}/api/login/"
 GRAPHQL_URL = f"{BASE_URL}/graphql/"
 
-def get_token():
-    data = {"username": "admin", "password": "admin"}
-    response = requests.post(LOGIN_URL, json=data)
-    try:
-        return response.json()["access"]
-    except (KeyError, requests.exceptions.RequestException) as e:
-        print("Error getting token:", e)
-        return None
-
-ACCESS_TOKEN = get_token()
-if not ACCESS_TOKEN:
-    print("Failed to get token. Exiting.")
-    exit(1)
-
-headers = {
-    "Authorization": f"Bearer {ACCESS_TOKEN}",
-    "Content-Type": "application/json"
-}
-
-def run_query(query, variables=None):
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-    response = requests.post(GRAPHQL_URL, json=payload, headers=headers)
-    try:
-        print(f"Query: {query}\nResponse: {response.json()}\n")
-    except requests.exceptions.JSONDecodeError:
-        print(f"Query: {query}\nRaw response: {response.text}\n")
-
-# 1. Create ingredient
-run_query("""
+# The example operations, in the order they are run below. Also used as the
+# GraphQL part of the load mix in benchmarks/load.py.
+OPERATIONS = [
+    # 1. Create ingredient
+    ("create_ingredient", """
 mutation CreateIngredient($input: IngredientInput!) {
   createIngredient(input: $input) {
     id
@@ -42,10 +14,10 @@ mutation CreateIngredient($input: IngredientInput!) {
     unit
   }
 }
-""", variables={"input": {"name": "Salt", "unit": "g"}})
+""", {"input": {"name": "Salt", "unit": "g"}}),
 
-# 2. Query ingredients with pagination
-run_query("""
+    # 2. Query ingredients with pagination
+    ("list_ingredients", """
 query {
   ingredients(limit: 10, offset: 0) {
     id
@@ -53,10 +25,10 @@ query {
     unit
   }
 }
-""")
+""", None),
 
-# 3. Create recipe with ingredients
-run_query("""
+    # 3. Create recipe with ingredients
+    ("create_recipe", """
 mutation CreateRecipe($input: RecipeInput!) {
   createRecipe(input: $input) {
     id
@@ -73,14 +45,14 @@ mutation CreateRecipe($input: RecipeInput!) {
     }
   }
 }
-""", variables={"input": {
-    "name": "Simple Salad",
-    "description": "A simple salad recipe",
-    "ingredients": [1, 2]  # Using IDs of existing ingredients
-}})
+""", {"input": {
+        "name": "Simple Salad",
+        "description": "A simple salad recipe",
+        "ingredients": [1, 2]  # Using IDs of existing ingredients
+    }}),
 
-# 4. Query recipes with search and pagination
-run_query("""
+    # 4. Query recipes with search and pagination
+    ("search_recipes", """
 query {
   recipes(name: "Salad", limit: 10, offset: 0) {
     id
@@ -97,10 +69,10 @@ query {
     }
   }
 }
-""")
+""", None),
 
-# 5. Update recipe
-run_query("""
+    # 5. Update recipe
+    ("update_recipe", """
 mutation UpdateRecipe($id: Int!, $input: UpdateRecipeInput!) {
   updateRecipe(id: $id, input: $input) {
     id
@@ -117,17 +89,17 @@ mutation UpdateRecipe($id: Int!, $input: UpdateRecipeInput!) {
     }
   }
 }
-""", variables={
-    "id": 1,
-    "input": {
-        "name": "Updated Salad",
-        "description": "An updated salad recipe",
-        "ingredients": [1, 2]
-    }
-})
+""", {
+        "id": 1,
+        "input": {
+            "name": "Updated Salad",
+            "description": "An updated salad recipe",
+            "ingredients": [1, 2]
+        }
+    }),
 
-# 6. Add ingredient to recipe
-run_query("""
+    # 6. Add ingredient to recipe
+    ("add_ingredient_to_recipe", """
 mutation AddIngredientToRecipe($input: RecipeIngredientInput!) {
   addIngredientToRecipe(input: $input) {
     id
@@ -142,11 +114,48 @@ mutation AddIngredientToRecipe($input: RecipeIngredientInput!) {
     }
   }
 }
-""", variables={"input": {"recipeId": 1, "ingredientId": 1, "quantity": 2.0}})
+""", {"input": {"recipeId": 1, "ingredientId": 1, "quantity": 2.0}}),
 
-# 7. Remove ingredient from recipe
-run_query("""
+    # 7. Remove ingredient from recipe
+    ("remove_ingredient_from_recipe", """
 mutation RemoveIngredientFromRecipe($recipeId: Int!, $ingredientId: Int!) {
   removeIngredientFromRecipe(recipeId: $recipeId, ingredientId: $ingredientId)
 }
-""", variables={"recipeId": 1, "ingredientId": 1}) 
\ No newline at end of file
+""", {"recipeId": 1, "ingredientId": 1}),
+]
+
+def get_token():
+    data = {"username": "admin", "password": "admin"}
+    response = requests.post(LOGIN_URL, json=data)
+    try:
+        return response.json()["access"]
+    except (KeyError, requests.exceptions.RequestException) as e:
+        print("Error getting token:", e)
+        return None
+
+def run_query(query, variables=None):
+    payload = {"query": query}
+    if variables:
+        payload["variables"] = variables
+    response = requests.post(GRAPHQL_URL, json=payload, headers=headers)
+    try:
+        print(f"Query: {query}\nResponse: {response.json()}\n")
+    except requests.exceptions.JSONDecodeError:
+        print(f"Query: {query}\nRaw response: {response.text}\n")
+
+if __name__ == "__main__":
+    # Imported here so OPERATIONS can be used without requests installed
+    import requests
+
+    ACCESS_TOKEN = get_token()
+    if not ACCESS_TOKEN:
+        print("Failed to get token. Exiting.")
+        exit(1)
+
+    headers = {
+        "Authorization": f"Bearer {ACCESS_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+    for _, query, variables in OPERATIONS:
+        run_query(query, variables)
\ No newline at end of file